@@ -1,93 +1,14 @@
 #!/usr/bin/env python3
 import pandas as pd
-import subprocess
-import os
 from collections import defaultdict
 import matplotlib.pyplot as plt
 from math import sqrt
-
-cities_not_in_worldcities = {
-    "Provincetown": "Massachusetts",
-    "Bar Harbor": "Maine",
-    "Raleigh/Durham": "North Carolina",
-    "Martha's Vineyard": "Massachusetts",
-    "Bedford/Hanscom": "Massachusetts",
-    "Saranac Lake": "New York",
-    "Dulles": "Virginia",
-    "Westchester County": "New York",
-    "Hyannis": "Massachusetts",
-    "Saint Louis": "Missouri",
-    "Farmingdale": "New York",
-    "Belmar": "New Jersey",
-    "Pellston": "Michigan",
-    "Greensboro/High Point": "North Carolina",
-    "Latrobe": "Pennsylvania",
-    "Teterboro": "New Jersey",
-    "Stowe": "Vermont",
-    "Westhampton Beach": "New York",
-    "Page": "Arizona",
-    "Selinsgrove": "Pennsylvania",
-    "Hilton Head": "South Carolina",
-    "Eastport": "Maine",
-    "Salisbury-Ocean City": "Maryland",
-    "Dillon": "Montana",
-    "Placida": "Florida",
-    "Laporte": "Indiana",
-    "Saint Paul": "Minnesota",
-    "Farmville": "Virginia",
-    "Saint Augustine": "Florida",
-    "Mt Vernon": "Illinois",
-    "Fishers Island": "New York",
-    "Aspen": "Colorado",
-    "Ocean Reef": "Florida",
-    "Montauk Point": "New York",
-    "Wiscasset": "Maine",
-    "Port Clinton": "Ohio",
-    "Manteo": "North Carolina",
-    "Islesboro": "Maine",
-    "Houlton": "Maine",
-    "Currituck": "North Carolina",
-    "Lake Placid": "New York",
-    "Block Island": "Rhode Island",
-    "Rangeley": "Maine",
-    "Reedsville": "Pennsylvania",
-    "Kailua-Kona": "Hawaii",
-    "Edenton": "North Carolina",
-    "Millinocket": "Maine",
-    "Winnsboro": "Louisiana",
-    "Great Barrington": "Massachusetts",
-    "Blue Bell": "Pennsylvania",
-    "Kayenta": "Arizona",
-    "Bristol, VA/Johnson City/Kingsport": "Virginia",
-    "Mount Pocono": "Pennsylvania",
-    "Waller County": "Texas",
-    "Thomson": "Georgia",
-    "Saint Thomas": "Virgin Islands",
-    "Lorain/Elyria": "Ohio",
-}
-
-
-def get_arrivals(day, month):
-    if not os.path.exists("flight_data"):
-        os.makedirs("flight_data")
-    flight_data_path = f"flight_data/2023-{month:02d}-{day:02d}.csv"
-    if not os.path.exists(flight_data_path):
-        subprocess.check_call(
-            [
-                "aws",
-                "s3",
-                "cp",
-                f"s3://nao-bostraffic/Data/Arrivals/2023-{month:02d}-{day:02d}_BOS_Arrivals.csv",
-                flight_data_path,
-            ]
-        )
-    return flight_data_path
+from arrivals import get_arrivals
+from cities import load_city_index, resolve_city
 
 
 def plot_flight_origins():
-    # https://simplemaps.com/static/data/world-cities/basic/simplemaps_worldcities_basicv1.76.zip
-    cities_data = pd.read_csv("worldcities.csv")
-    cities = cities_data["city_ascii"].values
+    city_index = load_city_index()
 
     unknown_counts = defaultdict(int)
     total_origin_counts = defaultdict(int)
@@ -101,27 +22,18 @@ def plot_flight_origins():
 
     MONTH = 11  # November
     for day, ax in zip(day_range, axs):
-        flight_data_path = get_arrivals(day, MONTH)
+        flight_data_path = get_arrivals(day, MONTH, 2023)
         flight_data = pd.read_csv(flight_data_path)
         per_day_origin_counts = defaultdict(int)
         for origin_city in flight_data["Origin"].values:
-            if origin_city not in cities:
-                try:
-                    administrative_area = cities_not_in_worldcities[
-                        origin_city
-                    ]
-                    per_day_origin_counts[administrative_area] += 1
-                except:
-                    per_day_origin_counts["Unknown"] += 1
-                    total_origin_counts["Unknown"] += 1
+            location = resolve_city(origin_city, city_index)
+            if location is None:
+                administrative_area = "Unknown"
                 unknown_counts[origin_city] += 1
-                total_origin_counts[administrative_area] += 1
             else:
-                administrative_area = cities_data[
-                    cities_data["city_ascii"] == origin_city
-                ][["admin_name"]].values[0][0]
-                per_day_origin_counts[administrative_area] += 1
-                total_origin_counts[administrative_area] += 1
+                administrative_area = location[0]
+            per_day_origin_counts[administrative_area] += 1
+            total_origin_counts[administrative_area] += 1
         df = pd.DataFrame(
             list(per_day_origin_counts.items()), columns=["location", "count"]
         )
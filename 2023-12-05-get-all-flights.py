@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
-import pandas as pd
-import subprocess
-import os
 import csv
 from collections import defaultdict
 
 from datetime import datetime, date
+from airports import get_airport_codes, get_state_code_dict
+from arrivals import get_arrivals
 
 airports_not_in_sheet = {
     "MCO": "FL",
@@ -59,110 +58,11 @@ def time_to_float(t):
     return t.hour + t.minute / 60 + t.second / 3600
 
 
-def get_arrivals(day, month, year):
-    if not os.path.exists("flight_data"):
-        os.makedirs("flight_data")
-    flight_data_path = f"flight_data/{year}-{month:02d}-{day:02d}.csv"
-    if not os.path.exists(flight_data_path):
-        subprocess.check_call(
-            [
-                "aws",
-                "s3",
-                "cp",
-                f"s3://nao-bostraffic/Data/Arrivals/{year}-{month:02d}-{day:02d}_BOS_Arrivals.csv",
-                flight_data_path,
-            ]
-        )
-    return flight_data_path
-
-
-def get_state_code_dict():
-    state_code_dict = {}
-    with open("state_code_to_name.tsv", mode="r", encoding="utf-8") as file:
-        # source: https://docs.google.com/spreadsheets/d/1wU-Ibw9lOplcBMbCbfhgz3GeDx10yZ7iCQY1uHcMu88/edit#gid=0
-        # skip first line which contains source
-        next(file)
-        csv_reader = csv.DictReader(file, delimiter="\t")
-        for row in csv_reader:
-            state_code_dict[row["state_code"]] = row["state_name"]
-    return state_code_dict
-
-
-def get_airport_codes():
-    non_us_codes = defaultdict(tuple)
-    us_codes = defaultdict(tuple)
-    with open(
-        # source: https://docs.google.com/spreadsheets/u/1/d/1eepIWOHicQsLyZsb0mSXGPTXDp3vlql-aGuy1AWJED0/htmlview#
-        # TODO: Use official IATA data, this sheet has a couple of mistakes
-        # that I have to account for below
-        "Airport Codes by Country - Airport Codes List .tsv",
-        mode="r",
-        encoding="utf-8",
-    ) as file:
-        csv_reader = csv.DictReader(file, delimiter="\t")
-        for row in csv_reader:
-            fine_location, location, airport_code = (
-                row["City"],
-                row["Country "],  # note the space at the end of the key
-                row["Code"],
-            )
-            if location == "USA":
-                try:
-                    if airport_code == "DCA":
-                        city = "Washington"
-                        state = "DC"
-                    elif airport_code == "SFO":
-                        city = "San Francisco"
-                        state = "CA"
-                    elif airport_code == "IAD":
-                        city = "Washington"
-                        state = "VA"
-                    elif airport_code == "BWI":
-                        city = "Baltimore"
-                        state = "MD"
-                    elif airport_code == "ATL":
-                        city = "Atlanta"
-                        state = "GA"
-                    elif airport_code == "BUF":
-                        city = "Buffalo"
-                        state = "NY"
-                    elif airport_code == "SJU":
-                        city = "San Juan"
-                        state = "PR"
-                    elif airport_code == "IAG":
-                        city = "Niagara Falls"
-                        state = "NY"
-                    elif airport_code == "TRI":
-                        city = "Blountville"
-                        state = "TN"
-                    else:
-                        bits = fine_location.split(", ")
-                        city = bits[0]
-                        state = bits[-1]
-                        state = state.split(" ")[0]
-                except:
-                    print(fine_location)
-                    continue
-                us_codes[airport_code] = state
-                continue
-            else:
-                if airport_code == "SJU":
-                    city = "San Juan"
-                    state = "PR"
-                    us_codes[airport_code] = state
-                    continue
-                if "," in location:
-                    country = location.split(", ")[1]
-                else:
-                    country = location
-                non_us_codes[airport_code] = country
-
-    return us_codes, non_us_codes
-
-
 def create_all_flights_tsv():
-    us_codes, non_us_codes = get_airport_codes()
-    state_code_dict = get_state_code_dict()
+    us_codes, non_us_codes = get_airport_codes(
+        "Airport Codes by Country - Airport Codes List .tsv"
+    )
+    state_code_dict = get_state_code_dict("state_code_to_name.tsv")
     month_range = range(1, 13)
     day_range = range(1, 32)
     years = [2023, 2024]
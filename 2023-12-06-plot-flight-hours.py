@@ -1,57 +1,21 @@
 #!/usr/bin/env python3
 import pandas as pd
 import matplotlib.pyplot as plt
-from collections import defaultdict
-from datetime import datetime
-
-
-def time_to_float(t):
-    return t.hour + t.minute / 60 + t.second / 3600
+from flights import load_flights
 
 
 def create_df():
-    df = pd.read_csv(
-        "all_flights.tsv",
-        delimiter="\t",
-        names=[
-            "Origin",
-            "Origin Code",
-            "Date",
-            "Terminal",
-            "Equipment",
-            "Flight",
-            "Airline",
-            "Nation",
-            "State",
-            "Flight Time",
-        ],
-    )
+    df = load_flights()
+    # flights whose time couldn't be read count towards neither total
+    df = df[df["Flight Hours"].notna()]
+
+    us_flights = df["Nation"] == "United States"
+    df["Location"] = df["State"].where(us_flights, df["Nation"])
+    df["Type"] = us_flights.map({True: "US State", False: "Country"})
+    location_types = df.groupby("Location")["Type"].last()
 
-    flight_hour_counts = defaultdict(int)
-    flight_counts = defaultdict(int)
-    location_types = {}
-
-    count = 0
-    for _, row in df.iterrows():
-        # turn the string into a datetime object
-
-        try:
-            flight_time = datetime.strptime(row["Flight Time"], "%H:%M:%S")
-        except:
-            print(f"conversion of time {row['Flight Time']} failed")
-            count += 1
-            continue
-        flight_length = time_to_float(flight_time)
-
-        if row["Nation"] == "United States":
-            location = row["State"]
-            location_type = "US State"
-        else:
-            location = row["Nation"]
-            location_type = "Country"
-        flight_hour_counts[location] += flight_length
-        flight_counts[location] += 1
-        location_types[location] = location_type
+    flight_hour_counts = df.groupby("Location")["Flight Hours"].sum()
+    flight_counts = df.groupby("Location").size()
 
     flight_hour_count_df = pd.DataFrame(
         list(flight_hour_counts.items()), columns=["Location", "Count"]
@@ -1,42 +1,11 @@
 #!/usr/bin/env python3
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import datetime as dt
-
-
-def time_to_float(time):
-    try:
-        time_object = dt.datetime.strptime(time, "%H:%M:%S")
-        hours = (
-            time_object.hour
-            + time_object.minute / 60
-            + time_object.second / 3600
-        )
-        return hours
-    except:
-        print(f"conversion of time {time} failed")
-        return 0
+from flight_cube import read_cube
 
 
 def return_df():
-    df = pd.read_csv(
-        "all_flights.tsv",
-        delimiter="\t",
-        names=[
-            "Origin",
-            "Origin Code",
-            "Date",
-            "Terminal",
-            "Equipment",
-            "Flight",
-            "Airline",
-            "Nation",
-            "State",
-            "Flight Time",
-        ],
-    )
-    return df
+    return read_cube()
 
 
 def return_plotting_df():
@@ -48,8 +17,6 @@ def return_plotting_df():
         df["Nation"],
     )
 
-    df["Flight Hours"] = df["Flight Time"].apply(lambda x: time_to_float(x))
-
     df = df[df["Terminal"].isin(["A", "B", "C", "E"])]
 
     df = (
@@ -1,27 +1,11 @@
 #!/usr/bin/env python3
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from flight_cube import read_cube
 
 def return_df():
-    df = pd.read_csv(
-        "all_flights.tsv",
-        delimiter="\t",
-        names=[
-            "Origin",
-            "Origin Code",
-            "Date",
-            "Terminal",
-            "Equipment",
-            "Flight",
-            "Airline",
-            "Nation",
-            "State",
-            "Flight Time",
-        ],
-    )
-    return df
+    return read_cube()
 
 
 def return_plotting_df():
@@ -38,8 +22,8 @@ def return_plotting_df():
     ]  # Terminals that aren't in this list have less than 15 flights each
 
     df = (
-        df.groupby(["Plotting Origin", "Terminal"])
-        .size()
+        df.groupby(["Plotting Origin", "Terminal"])["Flights"]
+        .sum()
         .reset_index(name="Count")
     )
 
@@ -1,125 +1,16 @@
 #!/usr/bin/env python3
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import datetime as dt
-import ast
-
-
-def time_to_float(time):
-    time = time.strip()
-    try:
-        time_object = dt.datetime.strptime(time, "%H:%M:%S")
-        hours = (
-            time_object.hour
-            + time_object.minute / 60
-            + time_object.second / 3600
-        )
-        return hours
-    except Exception as e:
-        print(f"conversion of time {time} failed: {e}")
-        return 0
+from flight_cube import read_cube
 
 
 def return_flights():
-    with open("all_flights.tsv") as infile:
-        lines = infile.readlines()
-        us_flights = []
-        lines = lines[1:]
-        for line in lines:
-            (
-                origin,
-                origin_code,
-                date,
-                terminal,
-                equipment,
-                flight,
-                airline,
-                nation,
-                state,
-                flight_time,
-            ) = line.split("\t")
-            airlines = ast.literal_eval(airline)
-            prime_airline = airlines[0]
-            if nation == "Canada":
-                triturator_status = "Unknown"
-            elif prime_airline in ["United Airlines", "American Airlines"]:
-                triturator_status = "American Airlines\nTriturator"
-
-            elif prime_airline in [
-                "JetBlue Airways",
-                "Delta Air Lines",
-                "Southwest Airlines",
-            ]:
-                triturator_status = "Swissport\nTriturator"
-
-            elif prime_airline in [  # Swissport Ground Handling
-                "Porter Airlines",
-                "LATAM Airlines",
-                "Hawaiian Airlines",
-                "BermudAir",
-                "Korean Air",
-                "Iberia",
-                "Fly Play",
-                "SAS Scandinavian Airlines",
-                "Qatar Airways",  # Closest match to 'Qatar'
-                "Qatar Executive",  # Also a match for 'Qatar'
-                "TAP Air Portugal",
-                "Turkish Airlines",
-                "Hainan Airlines",
-                "El Al Israel Airlines",
-                "Aer Lingus",
-                "ITA Airways",
-                "Condor",
-            ]:
-                triturator_status = "Swissport\nTriturator"
-
-            elif nation != "United States":
-                triturator_status = "Swissport\nTriturator"
-
-            else:
-                triturator_status = "Unknown"
-
-            us_flights.append(
-                [
-                    origin,
-                    origin_code,
-                    date,
-                    terminal,
-                    equipment,
-                    flight,
-                    airline,
-                    nation,
-                    state,
-                    flight_time,
-                    triturator_status,
-                ]
-            )
-
-        us_flights_df = pd.DataFrame(us_flights)
-        # set headers
-        us_flights_df.columns = [
-            "Origin",
-            "Origin Code",
-            "Date",
-            "Terminal",
-            "Equipment",
-            "Flight",
-            "Airline",
-            "Nation",
-            "State",
-            "Flight Time",
-            "Triturator Status",
-        ]
-
-        return us_flights_df
+    return read_cube(triturator_rules="2024-01-31")
 
 
 def return_plotting_df():
     df = return_flights()
 
-    df["Flight Hours"] = df["Flight Time"].apply(time_to_float)
-
     df["Plotting Origin"] = np.where(
         df["Nation"] == "United States",
         df["State"],
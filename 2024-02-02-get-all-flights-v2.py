@@ -1,136 +1,24 @@
 #!/usr/bin/env python3
 import pandas as pd
-import subprocess
-import os
 import csv
 from collections import defaultdict
 import matplotlib.pyplot as plt
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 import re
-
-
-def get_time_zones():
-    time_zone_dict = {}
-    with open("time_zones.csv", mode="r", encoding="utf-8") as file:
-        for line in file:
-            location, time_zone = line.split(",")
-            time_zone_dict[location] = time_zone.strip()
-    return time_zone_dict
-
-
-def get_arrivals(day, month, year):
-    if not os.path.exists("flight_data"):
-        os.makedirs("flight_data")
-    flight_data_path = f"flight_data/{year}-{month:02d}-{day:02d}.csv"
-    if not os.path.exists(flight_data_path):
-        subprocess.check_call(
-            [
-                "aws",
-                "s3",
-                "cp",
-                f"s3://nao-bostraffic/Data/Arrivals/{year}-{month:02d}-{day:02d}_BOS_Arrivals.csv",
-                flight_data_path,
-            ]
-        )
-    return flight_data_path
-
-
-def get_state_code_dict():
-    state_code_dict = {}
-    with open("state_code_to_name.tsv", mode="r", encoding="utf-8") as file:
-        # source: https://docs.google.com/spreadsheets/d/1wU-Ibw9lOplcBMbCbfhgz3GeDx10yZ7iCQY1uHcMu88/edit#gid=0
-        # skip first line which contains source
-        next(file)
-        csv_reader = csv.DictReader(file, delimiter="\t")
-        for row in csv_reader:
-            state_code_dict[row["state_code"]] = row["state_name"]
-    return state_code_dict
-
-def get_minor_airport_codes():
-    minor_airport_codes = {}
-    with open("minor_airports.tsv", mode="r", encoding="utf-8") as file:
-        for line in file:
-            airport, location = line.split("\t")
-            minor_airport_codes[airport] = location.strip()
-    return minor_airport_codes
-
-def get_airport_codes():
-    non_us_codes = defaultdict(tuple)
-    us_codes = defaultdict(tuple)
-    with open(
-        # source: https://docs.google.com/spreadsheets/u/1/d/1eepIWOHicQsLyZsb0mSXGPTXDp3vlql-aGuy1AWJED0/htmlview#
-        # TODO: Use official IATA data, this sheet has a couple of mistakes
-        # that I have to account for below
-        "Airport Codes by Country - Airport Codes List .tsv",
-        mode="r",
-        encoding="utf-8",
-    ) as file:
-        csv_reader = csv.DictReader(file, delimiter="\t")
-        for row in csv_reader:
-            fine_location, location, airport_code = (
-                row["City"],
-                row["Country "],  # note the space at the end of the key
-                row["Code"],
-            )
-            if location == "USA":
-                try:
-                    if airport_code == "DCA":
-                        city = "Washington"
-                        state = "DC"
-                    elif airport_code == "SFO":
-                        city = "San Francisco"
-                        state = "CA"
-                    elif airport_code == "IAD":
-                        city = "Washington"
-                        state = "VA"
-                    elif airport_code == "BWI":
-                        city = "Baltimore"
-                        state = "MD"
-                    elif airport_code == "ATL":
-                        city = "Atlanta"
-                        state = "GA"
-                    elif airport_code == "BUF":
-                        city = "Buffalo"
-                        state = "NY"
-                    elif airport_code == "SJU":
-                        city = "San Juan"
-                        state = "PR"
-                    elif airport_code == "IAG":
-                        city = "Niagara Falls"
-                        state = "NY"
-                    elif airport_code == "TRI":
-                        city = "Blountville"
-                        state = "TN"
-                    else:
-                        bits = fine_location.split(", ")
-                        city = bits[0]
-                        state = bits[-1]
-                        state = state.split(" ")[0]
-                except:
-                    continue
-                us_codes[airport_code] = state
-                continue
-            else:
-                if airport_code == "SJU":
-                    city = "San Juan"
-                    state = "PR"
-                    us_codes[airport_code] = state
-                    continue
-                if "," in location:
-                    country = location.split(", ")[1]
-                else:
-                    country = location
-                non_us_codes[airport_code] = country
-
-    return us_codes, non_us_codes
+from airports import load_airport_index
+from arrivals import get_arrivals
 
 
 def create_all_flights_tsv():
-    us_codes, non_us_codes = get_airport_codes()
-    minor_airports = get_minor_airport_codes()
-    state_code_dict = get_state_code_dict()
-    time_zone_dict = get_time_zones()
+    # This script reads the tables at the repository root
+    airport_index = load_airport_index(
+        "airport_index.json",
+        airport_codes_tsv="Airport Codes by Country - Airport Codes List .tsv",
+        minor_airports_tsv="minor_airports.tsv",
+        state_codes_tsv="state_code_to_name.tsv",
+        time_zones_csv="time_zones.csv",
+    )
 
     month_range = range(1, 13)
     day_range = range(1, 32)
@@ -208,40 +96,15 @@ def create_all_flights_tsv():
                                 else:
                                     flight_exclusions["Unknown status, irregular arrival time"] += 1
                                     continue # Requires further investigation #FIXME #BUG
-                            if airport_code in us_codes:
-                                location = us_codes[airport_code]
-                                if location == "La":
-                                    location = "LA"
-                                try:
-                                    state = state_code_dict[location]
-                                except:
-                                    state = None
-                                country = "United States"
-                            elif airport_code in non_us_codes:
-                                location = non_us_codes[airport_code]
-                                country = location
-                                state = None
-                            elif (
-                                airport_code not in us_codes
-                                and airport_code not in non_us_codes
-                            ):
-                                try:
-                                    location = minor_airports[
-                                        airport_code
-                                    ]
-                                    if location in state_code_dict:
-                                        state = state_code_dict[location]
-                                        country = "United States"
-                                    else:
-                                        country = location
-                                        state = None
-                                except:
-                                    print(f"Missing airport code: {airport_code}")
-                                    missing_airport_codes[airport_code] += 1
-                                    flight_exclusions[
-                                        "Missing Airport Code"
-                                    ] += 1
-                                    continue
+                            try:
+                                country, state, departure_time_zone = (
+                                    airport_index[airport_code]
+                                )
+                            except KeyError:
+                                print(f"Missing airport code: {airport_code}")
+                                missing_airport_codes[airport_code] += 1
+                                flight_exclusions["Missing Airport Code"] += 1
+                                continue
 
                             if not arr_time:
                                 flight_exclusions[
@@ -264,11 +127,6 @@ def create_all_flights_tsv():
 
 
 
-                            if state is not None:
-                                departure_time_zone = time_zone_dict[state]
-                            else:
-                                departure_time_zone = time_zone_dict[country]
-
                             tz_adjusted_departure_datetime = (
                                 raw_departure_datetime.replace(
                                     tzinfo=ZoneInfo(departure_time_zone)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Airport code -> (country, state, time zone) lookups for the flight scripts.
+
+The source tables are small but need a fair amount of fixing up, so the
+resolved lookup is compiled once into AIRPORT_INDEX and only rebuilt when
+one of the source tables changes.
+"""
+
+import csv
+import json
+import os
+from collections import defaultdict
+
+from util import atomic_write, fingerprint
+
+AIRPORT_CODES_TSV = "data/Airport Codes by Country - Airport Codes List .tsv"
+MINOR_AIRPORTS_TSV = "data/minor_airports.tsv"
+STATE_CODES_TSV = "data/state_code_to_name.tsv"
+TIME_ZONES_CSV = "time_zones.csv"
+AIRPORT_INDEX = "data/airport_index.json"
+
+# The airport sheet has wrong or unparseable cities for these
+US_AIRPORT_STATES = {
+    "DCA": "DC",  # Washington
+    "SFO": "CA",  # San Francisco
+    "IAD": "VA",  # Washington
+    "BWI": "MD",  # Baltimore
+    "ATL": "GA",  # Atlanta
+    "BUF": "NY",  # Buffalo
+    "SJU": "PR",  # San Juan
+    "IAG": "NY",  # Niagara Falls
+    "TRI": "TN",  # Blountville
+}
+
+
+def get_time_zones(path=TIME_ZONES_CSV):
+    time_zone_dict = {}
+    with open(path, mode="r", encoding="utf-8") as file:
+        for line in file:
+            location, time_zone = line.split(",")
+            time_zone_dict[location] = time_zone.strip()
+    return time_zone_dict
+
+
+def get_state_code_dict(path=STATE_CODES_TSV):
+    state_code_dict = {}
+    with open(path, mode="r", encoding="utf-8") as file:
+        # source: https://docs.google.com/spreadsheets/d/1wU-Ibw9lOplcBMbCbfhgz3GeDx10yZ7iCQY1uHcMu88/edit#gid=0
+        # skip first line which contains source
+        next(file)
+        csv_reader = csv.DictReader(file, delimiter="\t")
+        for row in csv_reader:
+            state_code_dict[row["state_code"]] = row["state_name"]
+    return state_code_dict
+
+
+def get_minor_airport_codes(path=MINOR_AIRPORTS_TSV):
+    minor_airport_codes = {}
+    with open(path, mode="r", encoding="utf-8") as file:
+        for line in file:
+            airport, location = line.split("\t")
+            minor_airport_codes[airport] = location.strip()
+    return minor_airport_codes
+
+
+def get_airport_codes(path=AIRPORT_CODES_TSV):
+    non_us_codes = defaultdict(tuple)
+    us_codes = defaultdict(tuple)
+    with open(
+        # source: https://docs.google.com/spreadsheets/u/1/d/1eepIWOHicQsLyZsb0mSXGPTXDp3vlql-aGuy1AWJED0/htmlview#
+        # TODO: Use official IATA data, this sheet has a couple of mistakes
+        # that US_AIRPORT_STATES accounts for
+        path,
+        mode="r",
+        encoding="utf-8",
+    ) as file:
+        csv_reader = csv.DictReader(file, delimiter="\t")
+        for row in csv_reader:
+            fine_location, location, airport_code = (
+                row["City"],
+                row["Country "],  # note the space at the end of the key
+                row["Code"],
+            )
+            if airport_code in US_AIRPORT_STATES:
+                # SJU is listed under Puerto Rico rather than the USA
+                if location == "USA" or airport_code == "SJU":
+                    us_codes[airport_code] = US_AIRPORT_STATES[airport_code]
+                    continue
+            if location == "USA":
+                state = fine_location.split(", ")[-1].split(" ")[0]
+                us_codes[airport_code] = state
+            elif "," in location:
+                non_us_codes[airport_code] = location.split(", ")[1]
+            else:
+                non_us_codes[airport_code] = location
+
+    return us_codes, non_us_codes
+
+
+def resolve_airport(
+    airport_code, us_codes, non_us_codes, minor_airports, state_code_dict
+):
+    """Return (country, state) for an airport code, or None if unknown.
+
+    state is None for airports outside the US and for US airports whose
+    state code isn't in state_code_dict.
+    """
+    if airport_code in us_codes:
+        location = us_codes[airport_code]
+        if location == "La":
+            location = "LA"
+        return "United States", state_code_dict.get(location)
+    if airport_code in non_us_codes:
+        return non_us_codes[airport_code], None
+    if airport_code in minor_airports:
+        location = minor_airports[airport_code]
+        if location in state_code_dict:
+            return "United States", state_code_dict[location]
+        return location, None
+    return None
+
+
+def build_airport_index(
+    airport_codes_tsv=AIRPORT_CODES_TSV,
+    minor_airports_tsv=MINOR_AIRPORTS_TSV,
+    state_codes_tsv=STATE_CODES_TSV,
+    time_zones_csv=TIME_ZONES_CSV,
+):
+    """Resolve every known airport code to (country, state, time zone).
+
+    time zone is None when neither the state nor the country is in
+    time_zones.csv.
+    """
+    us_codes, non_us_codes = get_airport_codes(airport_codes_tsv)
+    minor_airports = get_minor_airport_codes(minor_airports_tsv)
+    state_code_dict = get_state_code_dict(state_codes_tsv)
+    time_zone_dict = get_time_zones(time_zones_csv)
+
+    airport_index = {}
+    for airport_code in {**minor_airports, **non_us_codes, **us_codes}:
+        country, state = resolve_airport(
+            airport_code,
+            us_codes,
+            non_us_codes,
+            minor_airports,
+            state_code_dict,
+        )
+        time_zone = time_zone_dict.get(state if state is not None else country)
+        airport_index[airport_code] = (country, state, time_zone)
+    return airport_index
+
+
+def load_airport_index(path=AIRPORT_INDEX, **sources):
+    """Load the compiled airport index, rebuilding it if it is stale.
+
+    sources are the source table paths, as build_airport_index() takes
+    them. Scripts that read other copies of the tables should compile them
+    into their own path.
+    """
+    sources = {
+        "airport_codes_tsv": AIRPORT_CODES_TSV,
+        "minor_airports_tsv": MINOR_AIRPORTS_TSV,
+        "state_codes_tsv": STATE_CODES_TSV,
+        "time_zones_csv": TIME_ZONES_CSV,
+        **sources,
+    }
+    fingerprints = {path: fingerprint(path) for path in sources.values()}
+    if os.path.exists(path):
+        with open(path) as inf:
+            compiled = json.load(inf)
+        if compiled["sources"] == fingerprints:
+            return {
+                airport_code: tuple(entry)
+                for airport_code, entry in compiled["airports"].items()
+            }
+
+    airport_index = build_airport_index(**sources)
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as outf:
+        json.dump({"sources": fingerprints, "airports": airport_index}, outf)
+    return airport_index
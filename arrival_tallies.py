@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Origin, equipment and admin-area tallies over the daily arrivals files.
+
+Each arrivals file is read once, in a process pool, and all the tallies
+the list-* scripts used to collect in separate passes come out together:
+
+    arrivals.tsv                 origin city -> flights
+    arrival_and_equipment.tsv    (origin city, equipment) -> flights
+    total_origin_counts.tsv      admin area -> flights
+    unassigned_cities.tsv        origin cities without an admin area
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import pandas as pd
+
+from arrivals import ARRIVALS_SOURCE, DEFAULT_AIRPORT, sync_arrivals
+from cities import load_city_index, resolve_city
+from util import DEFAULT_WORKERS
+
+
+@dataclass(kw_only=True)
+class ArrivalTallies:
+    origins: Counter = field(default_factory=Counter)
+    # (origin city, equipment) -> flights
+    origin_equipment: Counter = field(default_factory=Counter)
+    admin_areas: Counter = field(default_factory=Counter)
+    unassigned_cities: Counter = field(default_factory=Counter)
+
+    def merge(self, other):
+        self.origins.update(other.origins)
+        self.origin_equipment.update(other.origin_equipment)
+        self.admin_areas.update(other.admin_areas)
+        self.unassigned_cities.update(other.unassigned_cities)
+        return self
+
+
+_worker_city_index = None
+
+
+def _init_worker(city_index):
+    global _worker_city_index
+    _worker_city_index = city_index
+
+
+def tally_day(flight_data_path):
+    # Runs in a worker process
+    flight_data = pd.read_csv(
+        flight_data_path,
+        usecols=["Origin", "Equipment"],
+        dtype=str,
+        keep_default_na=False,
+    )
+    origins = flight_data["Origin"]
+    admin_areas = {}
+    unassigned = set()
+    for origin_city in origins.unique():
+        location = resolve_city(origin_city, _worker_city_index)
+        if location is None:
+            admin_areas[origin_city] = "Unknown"
+            unassigned.add(origin_city)
+        else:
+            admin_areas[origin_city] = location[0]
+
+    return ArrivalTallies(
+        origins=Counter(origins.value_counts(sort=False).to_dict()),
+        origin_equipment=Counter(
+            flight_data.groupby(["Origin", "Equipment"], sort=False)
+            .size()
+            .to_dict()
+        ),
+        admin_areas=Counter(
+            origins.map(admin_areas).value_counts(sort=False).to_dict()
+        ),
+        unassigned_cities=Counter(
+            origins[origins.isin(unassigned)]
+            .value_counts(sort=False)
+            .to_dict()
+        ),
+    )
+
+
+def tally_arrivals(
+    first_day,
+    last_day,
+    source=ARRIVALS_SOURCE,
+    workers=DEFAULT_WORKERS,
+    airport=DEFAULT_AIRPORT,
+):
+    days = [
+        first_day + timedelta(days=n)
+        for n in range((last_day - first_day).days + 1)
+    ]
+    flight_data_paths = sync_arrivals(days, source, airports=[airport])
+    for day in days:
+        if (airport, day) not in flight_data_paths:
+            print(f"No arrivals for {day}")
+
+    tallies = ArrivalTallies()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(load_city_index(),),
+    ) as executor:
+        # map keeps day order, so the tallies list cities in the order
+        # they first arrived
+        for day_tallies in executor.map(
+            tally_day,
+            [
+                flight_data_paths[airport, day]
+                for day in days
+                if (airport, day) in flight_data_paths
+            ],
+        ):
+            tallies.merge(day_tallies)
+    return tallies
+
+
+def write_arrivals(tallies, path="arrivals.tsv"):
+    with open(path, "w") as tsv:
+        for origin_city, n_flights in tallies.origins.items():
+            tsv.write(f"{origin_city}\t{n_flights}\n")
+
+
+def write_arrival_and_equipment(tallies, path="arrival_and_equipment.tsv"):
+    with open(path, "w") as tsv:
+        tsv.write("location\tequipment\tn_flights\n")
+        for key, n_flights in tallies.origin_equipment.items():
+            location, equipment = key
+            tsv.write(f"{location}\t{equipment}\t{n_flights}\n")
+
+
+def write_admin_areas(
+    tallies,
+    path="total_origin_counts.tsv",
+    unassigned_path="unassigned_cities.tsv",
+):
+    with open(unassigned_path, "w") as f:
+        for origin_city, n_flights in tallies.unassigned_cities.items():
+            f.write(f"{origin_city}\t{n_flights}\n")
+
+    with open(path, "w") as f:
+        for admin_area, n_flights in tallies.admin_areas.items():
+            f.write(f"{admin_area}\t{n_flights}\n")
+
+
+def start():
+    parser = argparse.ArgumentParser(
+        description="Tally origins, equipment and admin areas of arrivals."
+    )
+    parser.add_argument(
+        "--first-day", type=date.fromisoformat, default=date(2023, 4, 1)
+    )
+    parser.add_argument(
+        "--last-day", type=date.fromisoformat, default=date.today()
+    )
+    parser.add_argument("--source", default=ARRIVALS_SOURCE)
+    parser.add_argument("--airport", default=DEFAULT_AIRPORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    tallies = tally_arrivals(
+        args.first_day,
+        args.last_day,
+        args.source,
+        args.workers,
+        args.airport,
+    )
+    write_arrivals(tallies)
+    write_arrival_and_equipment(tallies)
+    write_admin_areas(tallies)
+
+
+if __name__ == "__main__":
+    start()
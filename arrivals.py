@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Local cache for the daily arrivals files in s3://nao-bostraffic.
+
+Each file is stored once under its SHA-256 in CACHE_DIR/objects, and
+CACHE_DIR/index/<file name>.json records which object holds it together
+with its size and checksum. Downloads go to a temporary file and are
+checked against the size reported by the source before they enter the
+cache, and every cache hit is re-checked, so a truncated or corrupted
+file is fetched again instead of being parsed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from util import atomic_write
+
+ARRIVALS_SOURCE = "s3://nao-bostraffic/Data/Arrivals/"
+CACHE_DIR = "data/flight_data"
+# Files are named <date>_<airport>_Arrivals.csv
+DEFAULT_AIRPORT = "BOS"
+
+
+def arrivals_file_name(day, airport=DEFAULT_AIRPORT):
+    return f"{day:%Y-%m-%d}_{airport}_Arrivals.csv"
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as inf:
+        for chunk in iter(lambda: inf.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def index_path(file_name, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, "index", f"{file_name}.json")
+
+
+def object_path(sha256, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, "objects", sha256[:2], f"{sha256}.csv")
+
+
+def cached_arrivals_path(file_name, cache_dir=CACHE_DIR, verify=True):
+    """Return the cached copy of file_name, or None if it isn't usable."""
+    try:
+        with open(index_path(file_name, cache_dir)) as inf:
+            entry = json.load(inf)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    path = object_path(entry["sha256"], cache_dir)
+    try:
+        if os.path.getsize(path) != entry["size"]:
+            return None
+    except FileNotFoundError:
+        return None
+    if verify and file_sha256(path) != entry["sha256"]:
+        return None
+    return path
+
+
+def store_arrivals(file_name, downloaded_path, cache_dir=CACHE_DIR):
+    """Move a complete download into the cache and index it."""
+    sha256 = file_sha256(downloaded_path)
+    size = os.path.getsize(downloaded_path)
+    path = object_path(sha256, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(downloaded_path, path)
+
+    entry_path = index_path(file_name, cache_dir)
+    with atomic_write(entry_path) as tmp_path, open(tmp_path, "w") as outf:
+        json.dump({"sha256": sha256, "size": size}, outf)
+    return path
+
+
+def source_size(file_name, source=ARRIVALS_SOURCE):
+    if source.startswith("s3://"):
+        bucket, _, prefix = source[len("s3://") :].partition("/")
+        output = subprocess.check_output(
+            [
+                "aws",
+                "s3api",
+                "head-object",
+                "--bucket",
+                bucket,
+                "--key",
+                f"{prefix}{file_name}",
+                "--query",
+                "ContentLength",
+            ]
+        )
+        return int(output)
+    return os.path.getsize(os.path.join(source, file_name))
+
+
+def download_arrivals(file_name, dest_path, source=ARRIVALS_SOURCE):
+    if source.startswith("s3://"):
+        subprocess.check_call(
+            ["aws", "s3", "cp", "--quiet", f"{source}{file_name}", dest_path]
+        )
+    else:
+        # a local directory standing in for the S3 prefix
+        shutil.copyfile(os.path.join(source, file_name), dest_path)
+
+
+def get_arrivals(
+    day,
+    month,
+    year,
+    source=ARRIVALS_SOURCE,
+    cache_dir=CACHE_DIR,
+    airport=DEFAULT_AIRPORT,
+):
+    """Return a local path to the airport's arrivals file for the given day.
+
+    Raises an exception if the file can't be fetched or the download is
+    incomplete.
+    """
+    file_name = arrivals_file_name(date(year, month, day), airport)
+    path = cached_arrivals_path(file_name, cache_dir)
+    if path is not None:
+        return path
+
+    expected_size = source_size(file_name, source)
+    tmp_dir = os.path.join(cache_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".csv")
+    os.close(fd)
+    try:
+        download_arrivals(file_name, tmp_path, source)
+        size = os.path.getsize(tmp_path)
+        if size != expected_size:
+            raise IOError(
+                f"Truncated download of {file_name}: "
+                f"{size} of {expected_size} bytes"
+            )
+        return store_arrivals(file_name, tmp_path, cache_dir)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def list_arrivals(source=ARRIVALS_SOURCE, s3_client=None):
+    """Return {file name: size} for every file under source."""
+    if not source.startswith("s3://"):
+        return {
+            file_name: os.path.getsize(os.path.join(source, file_name))
+            for file_name in os.listdir(source)
+        }
+    bucket, _, prefix = source[len("s3://") :].partition("/")
+    sizes = {}
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            sizes[item["Key"][len(prefix) :]] = item["Size"]
+    return sizes
+
+
+def sync_arrivals(
+    days,
+    source=ARRIVALS_SOURCE,
+    cache_dir=CACHE_DIR,
+    workers=16,
+    endpoint_url=None,
+    airports=(DEFAULT_AIRPORT,),
+):
+    """Make sure every available day in days is in the local cache.
+
+    Lists the source once, then downloads all missing files for all
+    airports concurrently through a single boto3 client (one connection
+    pool) instead of one aws CLI process per file. endpoint_url points
+    the client at an S3 compatible server such as MinIO.
+
+    Returns:
+        {(airport, day): local path} for the files that exist in the source
+    """
+    s3_client = None
+    if source.startswith("s3://"):
+        # only needed for bulk syncs, so not a module-level dependency
+        import boto3
+        from botocore.config import Config
+
+        s3_client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=workers),
+        )
+        bucket, _, prefix = source[len("s3://") :].partition("/")
+    available = list_arrivals(source, s3_client)
+
+    paths = {}
+    missing = {}
+    for airport in airports:
+        for day in days:
+            file_name = arrivals_file_name(day, airport)
+            if file_name not in available:
+                continue
+            path = cached_arrivals_path(file_name, cache_dir)
+            # a size change means the file was still being written (e.g.
+            # today's arrivals) when we cached it
+            if (
+                path is not None
+                and os.path.getsize(path) == available[file_name]
+            ):
+                paths[airport, day] = path
+            else:
+                missing[airport, day] = file_name
+
+    tmp_dir = os.path.join(cache_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    def fetch(file_name):
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".csv")
+        os.close(fd)
+        try:
+            if s3_client is not None:
+                s3_client.download_file(
+                    bucket, f"{prefix}{file_name}", tmp_path
+                )
+            else:
+                download_arrivals(file_name, tmp_path, source)
+            size = os.path.getsize(tmp_path)
+            if size != available[file_name]:
+                raise IOError(
+                    f"Truncated download of {file_name}: "
+                    f"{size} of {available[file_name]} bytes"
+                )
+            return store_arrivals(file_name, tmp_path, cache_dir)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch, file_name): key
+            for key, file_name in missing.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                paths[key] = future.result()
+            except Exception as e:
+                print(f"failed to fetch {missing[key]}: {e}")
+    return paths
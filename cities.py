@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Origin city -> (admin area, country, lat, lon) lookups.
+
+worldcities.csv has about 40k rows, so it is compiled once into CITY_INDEX,
+keyed both by exact city name and by a normalized form of it, and only
+rebuilt when the CSV changes. Cities the CSV doesn't know are resolved
+from CITY_ALIASES.
+"""
+
+import csv
+import json
+import os
+import re
+import unicodedata
+
+from util import atomic_write, fingerprint
+
+# https://simplemaps.com/static/data/world-cities/basic/simplemaps_worldcities_basicv1.76.zip
+WORLDCITIES_CSV = "worldcities.csv"
+CITY_INDEX = "data/city_index.json"
+
+# Origins in the arrivals data that aren't in worldcities.csv
+CITY_ALIASES = {
+    "Provincetown": "Massachusetts",
+    "Bar Harbor": "Maine",
+    "Raleigh/Durham": "North Carolina",
+    "Martha's Vineyard": "Massachusetts",
+    "Bedford/Hanscom": "Massachusetts",
+    "Saranac Lake": "New York",
+    "Dulles": "Virginia",
+    "Westchester County": "New York",
+    "Hyannis": "Massachusetts",
+    "Saint Louis": "Missouri",
+    "Farmingdale": "New York",
+    "Belmar": "New Jersey",
+    "Pellston": "Michigan",
+    "Greensboro/High Point": "North Carolina",
+    "Latrobe": "Pennsylvania",
+    "Teterboro": "New Jersey",
+    "Stowe": "Vermont",
+    "Westhampton Beach": "New York",
+    "Page": "Arizona",
+    "Selinsgrove": "Pennsylvania",
+    "Hilton Head": "South Carolina",
+    "Eastport": "Maine",
+    "Salisbury-Ocean City": "Maryland",
+    "Dillon": "Montana",
+    "Placida": "Florida",
+    "Laporte": "Indiana",
+    "Saint Paul": "Minnesota",
+    "Farmville": "Virginia",
+    "Saint Augustine": "Florida",
+    "Mt Vernon": "Illinois",
+    "Fishers Island": "New York",
+    "Aspen": "Colorado",
+    "Ocean Reef": "Florida",
+    "Montauk Point": "New York",
+    "Wiscasset": "Maine",
+    "Port Clinton": "Ohio",
+    "Manteo": "North Carolina",
+    "Islesboro": "Maine",
+    "Houlton": "Maine",
+    "Currituck": "North Carolina",
+    "Lake Placid": "New York",
+    "Block Island": "Rhode Island",
+    "Rangeley": "Maine",
+    "Reedsville": "Pennsylvania",
+    "Kailua-Kona": "Hawaii",
+    "Edenton": "North Carolina",
+    "Millinocket": "Maine",
+    "Winnsboro": "Louisiana",
+    "Great Barrington": "Massachusetts",
+    "Blue Bell": "Pennsylvania",
+    "Kayenta": "Arizona",
+    "Bristol, VA/Johnson City/Kingsport": "Virginia",
+    "Mount Pocono": "Pennsylvania",
+    "Waller County": "Texas",
+    "Thomson": "Georgia",
+    "Saint Thomas": "Virgin Islands",
+    "Lorain/Elyria": "Ohio",
+}
+
+# Abbreviations spelled out before matching, e.g. "St. Louis" = "Saint Louis"
+ABBREVIATIONS = {"st": "saint", "ste": "sainte", "mt": "mount", "ft": "fort"}
+
+
+def normalize_city_name(name):
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    words = re.sub(r"[^a-z0-9]+", " ", name.casefold()).split()
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def build_city_index(path=WORLDCITIES_CSV):
+    """Compile worldcities.csv into exact and normalized name lookups.
+
+    Each entry is [admin area, country, lat, lon]. Where several cities
+    share a name the first one in the CSV, the most populous, wins.
+    """
+    exact = {}
+    normalized = {}
+    with open(path, newline="") as inf:
+        for row in csv.DictReader(inf):
+            entry = [
+                row["admin_name"] or None,
+                row["country"],
+                float(row["lat"]),
+                float(row["lng"]),
+            ]
+            exact.setdefault(row["city_ascii"], entry)
+            normalized.setdefault(normalize_city_name(row["city"]), entry)
+            normalized.setdefault(
+                normalize_city_name(row["city_ascii"]), entry
+            )
+    return {"exact": exact, "normalized": normalized}
+
+
+def load_city_index(path=CITY_INDEX):
+    """Load the compiled city index, rebuilding it if it is stale."""
+    source = fingerprint(WORLDCITIES_CSV)
+    if os.path.exists(path):
+        with open(path) as inf:
+            compiled = json.load(inf)
+        if compiled["source"] == source:
+            return compiled
+
+    compiled = {"source": source, **build_city_index()}
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as outf:
+        json.dump(compiled, outf)
+    return compiled
+
+
+NORMALIZED_ALIASES = {
+    normalize_city_name(city): admin_area
+    for city, admin_area in CITY_ALIASES.items()
+}
+
+
+def resolve_city(name, city_index):
+    """Return (admin area, country, lat, lon) for a city, or None.
+
+    The name is looked up as is in worldcities.csv, then as is in
+    CITY_ALIASES, then normalized in CITY_ALIASES, then normalized in
+    worldcities.csv, so a normalized alias wins over a normalized
+    worldcities.csv name. Aliases have no coordinates.
+    """
+    if name in city_index["exact"]:
+        return tuple(city_index["exact"][name])
+    if name in CITY_ALIASES:
+        return CITY_ALIASES[name], "United States", None, None
+    normalized = normalize_city_name(name)
+    if normalized in NORMALIZED_ALIASES:
+        return NORMALIZED_ALIASES[normalized], "United States", None, None
+    if normalized in city_index["normalized"]:
+        return tuple(city_index["normalized"][normalized])
+    return None
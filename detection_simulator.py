@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+"""Simulate the cumulative incidence at which a pathogen gets detected.
+
+simulate_one() follows a single epidemic day by day until sequencing has
+made enough observations. simulate_batch() draws the same distribution for
+many epidemics at once, advancing all of them a day at a time as arrays
+and dropping each one as it finishes, which is what simulate_many() uses.
+
+sweep() runs simulate_batch() over a grid of Inputs values in a process
+pool, for comparing configurations such as cost against sensitivity.
+
+Seeded results are cached under SIMULATION_CACHE_DIR, keyed by a hash of
+the full Inputs, the number of replicates, the seed and this file's
+contents, so any change to the simulator invalidates them.
+"""
+
+import copy
+import dataclasses
+import hashlib
+import itertools
+import json
+import locale
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from util import DEFAULT_WORKERS, atomic_write
+
+SIMULATION_CACHE_DIR = "data/cache/simulations"
+EPSILON = 0.000001
+DAYS_PER_WEEK = "mtwrfsu"
+MAX_DAYS = 365 * 10
+
+
+@dataclass(kw_only=True, eq=True)
+class PathogenProperties:
+    name: str = "Sars_CoV-2"
+    doubling_time: int = 3
+    cv_doubling_time: float = 10.0
+    genome_length: int = 30000
+
+
+@dataclass(kw_only=True, eq=True)
+class SamplingParameters:
+    """Parameters for sampling in pathogen detection"""
+
+    shedding_values: List[float] = field(
+        default_factory=lambda: [
+            5e-06,
+            1e-04,
+            2e-04,
+            3e-04,
+            7e-04,
+            8e-04,
+            1e-03,
+            6e-03,
+            8e-03,
+            1e-02,
+            2e-02,
+            3e-02,
+            7e-02,
+            4e-01,
+            8e-01,
+        ]
+    )
+    sigma_shedding_values: float = 0.05
+    shedding_duration: int = 7
+    sigma_shedding_duration: float = 0.05
+    sample_population: int = 100
+    sample_cost: float = 200
+    low_quality: bool = False
+    direct_flaggable: bool = False
+
+
+@dataclass(kw_only=True, eq=True)
+class SequencingParameters:
+    read_length: int = 10000
+    sample_depth: int = int(8e5)
+    run_cost: float = 450
+    processing_delay: int = 4
+
+
+@dataclass(kw_only=True, eq=True)
+class SamplingSequencingSchedule:
+    # Sampling and sequencing schedules (True for active days)
+    sampling_m: bool = True
+    sampling_t: bool = True
+    sampling_w: bool = True
+    sampling_r: bool = True
+    sampling_f: bool = True
+    sampling_s: bool = False
+    sampling_u: bool = False
+    sequencing_m: bool = True
+    sequencing_t: bool = True
+    sequencing_w: bool = True
+    sequencing_r: bool = True
+    sequencing_f: bool = True
+    sequencing_s: bool = False
+    sequencing_u: bool = False
+
+
+@dataclass(kw_only=True, eq=True)
+class GlobalSettings:
+    min_observations: int = 2
+    sites: int = 1
+    population_size: int = 1e10
+    overhead: float = 50.0
+
+
+number_of_simulations = 1000
+
+
+@dataclass(kw_only=True, eq=True)
+class Inputs:
+    pathogen_props: PathogenProperties
+    sampling_params: SamplingParameters
+    sequencing_params: SequencingParameters
+    schedule: SamplingSequencingSchedule
+    global_settings: GlobalSettings
+    number_of_simulations: int = 1000
+
+    @classmethod
+    def create_default(cls):
+        return cls(
+            pathogen_props=PathogenProperties(),
+            sampling_params=SamplingParameters(),
+            sequencing_params=SequencingParameters(),
+            schedule=SamplingSequencingSchedule(),
+            global_settings=GlobalSettings(),
+            number_of_simulations=number_of_simulations,
+        )
+
+
+# The draws below take a numpy.random.Generator, so that runs can be
+# seeded and repeated. With size, they return an array of that many draws.
+
+
+def get_input_cv(input_value, input_cv, rng, size=None):
+    mean = float(input_value)
+    cv = float(input_cv) / 100
+
+    if cv < EPSILON:
+        return mean if size is None else np.full(size, mean)
+
+    stdev = cv * mean
+    return rng.normal(mean, stdev, size)
+
+
+def get_input_sigma(input_value, input_sigma, rng, size=None):
+    geom_mean = float(input_value)
+    sigma = float(input_sigma)
+
+    if sigma < EPSILON:
+        return geom_mean if size is None else np.full(size, geom_mean)
+
+    return np.exp(rng.normal(math.log(geom_mean), sigma, size))
+
+
+def get_inputs_biased(input_values, input_sigma, rng):
+    empirical_values = [float(x) for x in input_values]
+    sigma = float(input_sigma)
+    if sigma < EPSILON:
+        return empirical_values
+
+    bias = get_input_sigma(1, sigma, rng)
+
+    return [empirical_value * bias for empirical_value in empirical_values]
+
+
+def fraction_useful_reads(inputs: Inputs):
+    sampling_params = inputs.sampling_params
+    bp_genome_length = int(inputs.pathogen_props.genome_length)
+    read_length_usable = min(
+        int(inputs.sequencing_params.read_length), bp_genome_length
+    )
+
+    if sampling_params.low_quality:
+        read_length_usable = min(read_length_usable, 120)
+
+    if sampling_params.direct_flaggable:
+        return 1
+
+    return read_length_usable / bp_genome_length
+
+
+def weekly_schedule(schedule: SamplingSequencingSchedule):
+    should_sample = [
+        getattr(schedule, f"sampling_{day}") for day in DAYS_PER_WEEK
+    ]
+    should_sequence = [
+        getattr(schedule, f"sequencing_{day}") for day in DAYS_PER_WEEK
+    ]
+    return should_sample, should_sequence
+
+
+def infection_window_factor(growth_factor, detectable_days):
+    """Sum growth_factor**-i over the int(detectable_days) shedding days.
+
+    Someone sick today was infected on one of the last detectable_days
+    days, when daily incidence was growth_factor**i times lower, so daily
+    incidence times this factor is the fraction of people shedding. The
+    geometric series has a closed form, so this is O(1) however long
+    shedding lasts. Works elementwise on arrays of replicates.
+    """
+    days = np.maximum(np.trunc(detectable_days), 0)
+    log_growth = np.log(growth_factor)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # (1 - g**-days) / (1 - 1/g), accurate for g close to 1
+        factor = np.expm1(-days * log_growth) / np.expm1(-log_growth)
+    # Without growth every shedding day counts once
+    return np.where(log_growth == 0, days, factor)[()]
+
+
+def simulate_one(inputs: Inputs, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    pathogen_props = inputs.pathogen_props
+    sampling_params = inputs.sampling_params
+    sequencing_params = inputs.sequencing_params
+    global_settings = inputs.global_settings
+
+    day = 0
+    population = global_settings.population_size
+    r = math.log(2) / get_input_cv(
+        pathogen_props.doubling_time, pathogen_props.cv_doubling_time, rng
+    )
+    growth_factor = math.exp(r)
+    cumulative_incidence = 1 / population
+
+    detectable_days = get_input_sigma(
+        sampling_params.shedding_duration,
+        sampling_params.sigma_shedding_duration,
+        rng,
+    )
+    ra_sicks = get_inputs_biased(
+        sampling_params.shedding_values,
+        sampling_params.sigma_shedding_values,
+        rng,
+    )
+    window_factor = infection_window_factor(growth_factor, detectable_days)
+
+    n_min_observations = int(global_settings.min_observations)
+    observations = 0
+
+    n_sites = int(global_settings.sites)
+    site_infos = [
+        {
+            "sample_sick": 0,
+            "sample_total": 0,
+            "day_offset": rng.integers(0, 6, endpoint=True),
+        }
+        for _ in range(n_sites)
+    ]
+
+    n_sample_population = int(sampling_params.sample_population)
+    useful_reads = fraction_useful_reads(inputs)
+
+    v_processing_delay_factor = growth_factor ** float(
+        sequencing_params.processing_delay
+    )
+    n_reads = int(sequencing_params.sample_depth)
+
+    should_sample, should_sequence = weekly_schedule(inputs.schedule)
+
+    while True:
+        day += 1
+        cumulative_incidence *= growth_factor
+
+        for site in range(n_sites):
+            day_of_week = (day + site_infos[site]["day_offset"]) % 7
+            if should_sample[day_of_week]:
+                daily_incidence = cumulative_incidence * r
+                individual_probability_sick = daily_incidence * window_factor
+                n_sick = rng.poisson(
+                    n_sample_population * individual_probability_sick
+                )
+                site_infos[site]["sample_sick"] += n_sick
+                site_infos[site]["sample_total"] += n_sample_population
+
+            if should_sequence[day_of_week]:
+                ra_sick = 0
+                if site_infos[site]["sample_sick"] == 0:
+                    ra_sick = 0
+                elif len(ra_sicks) == 1:
+                    ra_sick = ra_sicks[0]
+                elif site_infos[site]["sample_sick"] > len(ra_sicks) * 3:
+                    ra_sick = sum(ra_sicks) / len(ra_sicks)
+                else:
+                    ra_sick = sum(
+                        rng.choice(ra_sicks, site_infos[site]["sample_sick"])
+                    )
+                    ra_sick /= site_infos[site]["sample_sick"]
+
+                probability_read_is_useful = (
+                    site_infos[site]["sample_sick"]
+                    / site_infos[site]["sample_total"]
+                    * ra_sick
+                    * useful_reads
+                )
+
+                site_infos[site]["sample_sick"] = 0
+                site_infos[site]["sample_total"] = 0
+
+                if probability_read_is_useful > 0:
+                    observations += rng.poisson(
+                        n_reads * probability_read_is_useful
+                    )
+                    if observations >= n_min_observations:
+                        return cumulative_incidence * v_processing_delay_factor
+
+        if cumulative_incidence > 1 or day > MAX_DAYS:
+            return 1
+
+
+def simulate_batch(inputs: Inputs, n_simulations: int, rng=None):
+    """Run n_simulations of simulate_one() together.
+
+    Every replicate draws its own doubling time, shedding duration,
+    shedding bias and site day offsets, exactly as simulate_one() does, so
+    the results have the same distribution.
+
+    Args:
+        rng: numpy.random.Generator; a fresh one when None
+
+    Returns:
+        array of the cumulative incidence at detection per replicate, 1
+        where the pathogen went undetected
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    pathogen_props = inputs.pathogen_props
+    sampling_params = inputs.sampling_params
+    sequencing_params = inputs.sequencing_params
+    global_settings = inputs.global_settings
+    n = n_simulations
+
+    r = math.log(2) / get_input_cv(
+        pathogen_props.doubling_time,
+        pathogen_props.cv_doubling_time,
+        rng,
+        n,
+    )
+    growth_factor = np.exp(r)
+    detectable_days = get_input_sigma(
+        sampling_params.shedding_duration,
+        sampling_params.sigma_shedding_duration,
+        rng,
+        n,
+    )
+    window_factor = infection_window_factor(growth_factor, detectable_days)
+
+    # get_inputs_biased() scales every shedding value by one bias, so the
+    # replicates share the values and only keep their bias
+    shedding_values = np.array(sampling_params.shedding_values, dtype=float)
+    bias = get_input_sigma(1, sampling_params.sigma_shedding_values, rng, n)
+    n_values = len(shedding_values)
+    mean_shedding_value = shedding_values.mean()
+
+    n_min_observations = int(global_settings.min_observations)
+    n_sites = int(global_settings.sites)
+    n_sample_population = int(sampling_params.sample_population)
+    n_reads = int(sequencing_params.sample_depth)
+    useful_reads = fraction_useful_reads(inputs)
+    v_processing_delay_factor = growth_factor ** float(
+        sequencing_params.processing_delay
+    )
+    should_sample, should_sequence = weekly_schedule(inputs.schedule)
+    should_sample = np.array(should_sample)
+    should_sequence = np.array(should_sequence)
+
+    results = np.ones(n)
+    cumulative_incidence = np.full(n, 1 / global_settings.population_size)
+    observations = np.zeros(n, dtype=np.int64)
+    day_offsets = rng.integers(0, 6, size=(n, n_sites), endpoint=True)
+    sample_sick = np.zeros((n, n_sites), dtype=np.int64)
+    sample_total = np.zeros((n, n_sites), dtype=np.int64)
+    # Indices into results of the replicates still running
+    running = np.arange(n)
+
+    day = 0
+    while running.size:
+        day += 1
+        cumulative_incidence[running] *= growth_factor[running]
+        day_of_week = (day + day_offsets[running]) % 7
+
+        sampling = should_sample[day_of_week]
+        rows, sites = np.nonzero(sampling)
+        replicates = running[rows]
+        individual_probability_sick = (
+            cumulative_incidence[replicates]
+            * r[replicates]
+            * window_factor[replicates]
+        )
+        sample_sick[replicates, sites] += rng.poisson(
+            np.maximum(n_sample_population * individual_probability_sick, 0)
+        )
+        sample_total[replicates, sites] += n_sample_population
+
+        sequencing = should_sequence[day_of_week]
+        rows, sites = np.nonzero(sequencing)
+        replicates = running[rows]
+        n_sick = sample_sick[replicates, sites]
+        n_total = sample_total[replicates, sites]
+        sample_sick[replicates, sites] = 0
+        sample_total[replicates, sites] = 0
+
+        ra_sick = np.zeros(len(replicates))
+        if n_values == 1:
+            ra_sick[n_sick > 0] = shedding_values[0]
+        else:
+            ra_sick[n_sick > n_values * 3] = mean_shedding_value
+            # The mean of n_sick values drawn with replacement
+            drawn = np.nonzero((n_sick > 0) & (n_sick <= n_values * 3))[0]
+            if drawn.size:
+                k = n_sick[drawn]
+                choices = shedding_values[
+                    rng.integers(0, n_values, size=(drawn.size, k.max()))
+                ]
+                choices[np.arange(k.max()) >= k[:, None]] = 0
+                ra_sick[drawn] = choices.sum(axis=1) / k
+        probability_read_is_useful = np.divide(
+            n_sick * ra_sick * bias[replicates] * useful_reads,
+            n_total,
+            out=np.zeros(len(replicates)),
+            where=n_total > 0,
+        )
+        np.add.at(
+            observations,
+            replicates,
+            rng.poisson(n_reads * probability_read_is_useful),
+        )
+
+        # A replicate is detected on the day any of its sites brings the
+        # observations up to the minimum, whichever site that is
+        detected = observations[running] >= n_min_observations
+        results[running[detected]] = (
+            cumulative_incidence[running[detected]]
+            * v_processing_delay_factor[running[detected]]
+        )
+        running = running[~detected]
+        running = running[
+            (cumulative_incidence[running] <= 1) & (day <= MAX_DAYS)
+        ]
+    return results
+
+
+def annual_cost(inputs: Inputs):
+    sampling_params = inputs.sampling_params
+    sequencing_params = inputs.sequencing_params
+    schedule = inputs.schedule
+    global_settings = inputs.global_settings
+
+    # Calculate number of weekly samples and sequences
+    n_samples_weekly = sum(
+        getattr(schedule, f"sampling_{day}") for day in DAYS_PER_WEEK
+    )
+    n_sequences_weekly = sum(
+        getattr(schedule, f"sequencing_{day}") for day in DAYS_PER_WEEK
+    )
+
+    # Calculate total cost
+    return (
+        global_settings.sites
+        * (1 + (global_settings.overhead / 100))
+        * 52
+        * (
+            n_samples_weekly * sampling_params.sample_cost
+            + n_sequences_weekly * sequencing_params.run_cost
+        )
+    )
+
+
+def calculate_cost(inputs: Inputs):
+    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
+    formatted_cost = locale.currency(annual_cost(inputs), grouping=True)
+    return formatted_cost
+
+
+with open(__file__, "rb") as inf:
+    CODE_VERSION = hashlib.sha256(inf.read()).hexdigest()
+
+
+def plain_value(value):
+    # numpy scalars and arrays, e.g. from a grid built with np.arange, as
+    # the Python values they equal, so they hash the same
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Can't hash {type(value).__name__} input {value!r}")
+
+
+def inputs_digest(inputs: Inputs):
+    return hashlib.sha256(
+        json.dumps(
+            dataclasses.asdict(inputs), sort_keys=True, default=plain_value
+        ).encode()
+    ).hexdigest()
+
+
+def seed_key(seed):
+    # An int seeds the same generator as SeedSequence(seed)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)}
+
+
+def result_path(inputs: Inputs, n_simulations, seed, cache_dir, **details):
+    # details: anything else the results depend on
+    key = json.dumps(
+        {
+            "inputs": inputs_digest(inputs),
+            "n_simulations": n_simulations,
+            "seed": seed_key(seed),
+            "code_version": CODE_VERSION,
+            **details,
+        },
+        sort_keys=True,
+        default=plain_value,
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.npy")
+
+
+def load_result(path):
+    if path is None or not os.path.exists(path):
+        return None
+    return np.load(path)
+
+
+def save_result(path, results):
+    # Replicates are interchangeable, so they are stored, and returned,
+    # sorted
+    results = np.sort(results)
+    if path is not None:
+        with atomic_write(path) as tmp_path, open(tmp_path, "wb") as outf:
+            np.save(outf, results)
+    return results
+
+
+def simulate_many(
+    inputs: Inputs,
+    n_simulations: int,
+    seed=None,
+    cache_dir=SIMULATION_CACHE_DIR,
+):
+    """Results of n_simulations replicates, the same ones for the same seed.
+
+    seed may be an int or a SeedSequence; None for a fresh, unseeded run.
+    Seeded runs are cached in cache_dir (None not to) and come back
+    sorted.
+    """
+    if seed is None:
+        return simulate_batch(inputs, n_simulations).tolist()
+    path = None
+    if cache_dir is not None:
+        path = result_path(inputs, n_simulations, seed, cache_dir)
+    results = load_result(path)
+    if results is None:
+        results = save_result(
+            path,
+            simulate_batch(inputs, n_simulations, np.random.default_rng(seed)),
+        )
+    return results.tolist()
+
+
+INPUT_SECTIONS = [
+    "pathogen_props",
+    "sampling_params",
+    "sequencing_params",
+    "schedule",
+    "global_settings",
+]
+
+
+def set_input(inputs: Inputs, name, value):
+    """Set one Inputs field, in place.
+
+    name is either "section.field", e.g. "global_settings.sites", or just
+    the field name when only one section has it. A section name replaces
+    the whole section, e.g. "schedule" with a SamplingSequencingSchedule.
+    """
+    if name in INPUT_SECTIONS:
+        setattr(inputs, name, value)
+        return
+    if "." in name:
+        section, field_name = name.split(".")
+    else:
+        sections = [
+            section
+            for section in INPUT_SECTIONS
+            if hasattr(getattr(inputs, section), name)
+        ]
+        if len(sections) != 1:
+            raise ValueError(f"No single Inputs section has a field {name!r}")
+        section, field_name = sections[0], name
+    if not hasattr(getattr(inputs, section), field_name):
+        raise ValueError(f"Inputs.{section} has no field {field_name!r}")
+    setattr(getattr(inputs, section), field_name, value)
+
+
+def grid_configurations(grid, base: Inputs):
+    """Yield ({name: value}, Inputs) for every combination in grid.
+
+    grid maps input names (see set_input()) to the values to try. A tuple
+    of names maps to tuples of values that vary together, e.g.
+    {("sample_population", "sample_cost"): [(100, 740), (200, 1480)]}.
+    """
+    names = list(grid)
+    for combination in itertools.product(*grid.values()):
+        values = {}
+        for name, value in zip(names, combination):
+            if isinstance(name, tuple):
+                values.update(zip(name, value))
+            else:
+                values[name] = value
+        inputs = copy.deepcopy(base)
+        for name, value in values.items():
+            set_input(inputs, name, value)
+        yield values, inputs
+
+
+def simulate_chunk(inputs: Inputs, n_simulations: int, seed_sequence):
+    # Runs in a worker process
+    return simulate_batch(
+        inputs, n_simulations, np.random.default_rng(seed_sequence)
+    )
+
+
+def sweep(
+    grid,
+    base: Inputs = None,
+    n_simulations=None,
+    seed=0,
+    workers=DEFAULT_WORKERS,
+    chunk_size=250,
+    cache_dir=SIMULATION_CACHE_DIR,
+):
+    """Simulate every configuration in grid, in a process pool.
+
+    Each configuration's replicates are split into chunks of chunk_size
+    that run as separate tasks. Every chunk gets its own RNG stream,
+    spawned from seed and the configuration's inputs, so the results
+    don't depend on the number of workers, the order the tasks finish in
+    or the rest of the grid. Configurations already in cache_dir (None
+    not to cache) from an earlier sweep with the same seed aren't
+    simulated again; seed=None runs fresh and isn't cached.
+
+    Args:
+        grid: see grid_configurations()
+        base: inputs the grid changes; Inputs.create_default() when None
+        n_simulations: replicates per configuration; defaults to
+            base.number_of_simulations
+
+    Returns:
+        DataFrame with one row per replicate: "configuration" (its index
+        in the grid), a column per grid name with its value, "annual_cost",
+        "replicate" (in order of cumulative incidence) and
+        "cumulative_incidence" (1 if undetected)
+    """
+    base = Inputs.create_default() if base is None else base
+    n_simulations = n_simulations or base.number_of_simulations
+    configurations = list(grid_configurations(grid, base))
+    chunk_sizes = [
+        min(chunk_size, n_simulations - start)
+        for start in range(0, n_simulations, chunk_size)
+    ]
+
+    results = {}
+    pending = {}
+    for configuration, (_, inputs) in enumerate(configurations):
+        path = None
+        # An unseeded sweep can't be looked up again, so isn't cached
+        if cache_dir is not None and seed is not None:
+            path = result_path(
+                inputs, n_simulations, seed, cache_dir, chunk_size=chunk_size
+            )
+        cached = load_result(path)
+        if cached is None:
+            pending[configuration] = path
+        else:
+            results[configuration] = cached
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for configuration in pending:
+                inputs = configurations[configuration][1]
+                configuration_seed = np.random.SeedSequence(
+                    seed, spawn_key=(int(inputs_digest(inputs), 16),)
+                )
+                for chunk, seed_sequence in enumerate(
+                    configuration_seed.spawn(len(chunk_sizes))
+                ):
+                    future = executor.submit(
+                        simulate_chunk,
+                        inputs,
+                        chunk_sizes[chunk],
+                        seed_sequence,
+                    )
+                    futures[future] = configuration, chunk
+            chunk_results = {
+                configuration: [None] * len(chunk_sizes)
+                for configuration in pending
+            }
+            for future in as_completed(futures):
+                configuration, chunk = futures[future]
+                chunk_results[configuration][chunk] = future.result()
+                if all(
+                    result is not None
+                    for result in chunk_results[configuration]
+                ):
+                    results[configuration] = save_result(
+                        pending[configuration],
+                        np.concatenate(chunk_results[configuration]),
+                    )
+
+    return pd.DataFrame(
+        [
+            {
+                "configuration": configuration,
+                **values,
+                "annual_cost": annual_cost(inputs),
+                "replicate": replicate,
+                "cumulative_incidence": cumulative_incidence,
+            }
+            for configuration, (values, inputs) in enumerate(configurations)
+            for replicate, cumulative_incidence in enumerate(
+                results[configuration]
+            )
+        ]
+    )
+
+
+def summarize_sweep(results, quantiles=(0.25, 0.5, 0.75)):
+    """One row per configuration, with cumulative incidence quantiles.
+
+    Returns:
+        DataFrame with the grid and cost columns of sweep()'s results,
+        "detected" (the fraction of replicates that were) and a
+        "cumulative_incidence_q<quantile>" column per quantile
+    """
+    keys = [
+        column
+        for column in results.columns
+        if column not in ["replicate", "cumulative_incidence"]
+    ]
+    grouped = results.groupby("configuration")["cumulative_incidence"]
+    summary = results.groupby("configuration")[keys].first()
+    summary["detected"] = grouped.apply(lambda values: (values < 1).mean())
+    for quantile in quantiles:
+        summary[f"cumulative_incidence_q{quantile:g}"] = grouped.quantile(
+            quantile
+        )
+    return summary.reset_index(drop=True)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Seat capacity by aircraft type, to weight flights by passengers.
+
+EQUIPMENT_SEATS_TSV maps the ICAO type codes in the arrivals Equipment
+column to a typical seat count for that type as flown by the airlines
+serving BOS. Actual configurations vary by airline, so seat counts are a
+proxy for passengers, not a count of them.
+"""
+
+import csv
+
+EQUIPMENT_SEATS_TSV = "equipment_seats.tsv"
+
+
+def load_equipment_seats(path=EQUIPMENT_SEATS_TSV):
+    with open(path, newline="") as inf:
+        return {
+            row["Equipment"]: int(row["Seats"])
+            for row in csv.DictReader(inf, delimiter="\t")
+        }
+
+
+def seats_for(equipment, equipment_seats):
+    """Seats for each flight's equipment; <NA> for unknown types."""
+    codes = equipment.str.strip().str.upper()
+    return codes.map(
+        {code: equipment_seats.get(code) for code in codes.unique()}
+    ).astype("Int64")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Flight counts and hours pre-aggregated from the flights dataset.
+
+The cube has one row per arrival date, terminal, origin nation and state,
+and prime airline, holding the number of flights, their total flight
+seconds and their total seat seconds (seats times flight seconds, see
+equipment.py; flights on unknown equipment add no seat seconds). It is
+kept next to the dataset written by get-all-flights.py and only the day
+files that were added or changed since the last update are aggregated
+again.
+
+Triturator status is a function of the cube's dimensions, so read_cube()
+derives it for whichever triturator rule set the analysis asks for.
+"""
+
+import glob
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from arrivals import DEFAULT_AIRPORT
+from flights import FLIGHTS_DATASET
+from triturators import classify
+from util import atomic_write, fingerprint
+
+CUBE_DIR = "data/flight_cube"
+DIMENSIONS = ["Date", "Terminal", "Nation", "State", "Prime Airline"]
+MEASURES = ["Flights", "Flight Seconds", "Seat Seconds"]
+
+
+def cube_path(airport, cube_dir=CUBE_DIR):
+    return os.path.join(cube_dir, f"{airport}.parquet")
+
+
+def day_files(airport, dataset=FLIGHTS_DATASET):
+    # {day: (path, [mtime_ns, size])} for every complete day file of the
+    # airport
+    pattern = os.path.join(dataset, f"airport={airport}", "month=*", "*")
+    fingerprints = {}
+    for path in glob.glob(pattern):
+        # dot-prefixed files are still being written
+        if not path.endswith(".parquet"):
+            continue
+        day = os.path.basename(path)[: -len(".parquet")]
+        fingerprints[day] = (path, fingerprint(path))
+    return fingerprints
+
+
+def aggregate_day(path, day):
+    table = pq.read_table(
+        path,
+        columns=[
+            "Date",
+            "Terminal",
+            "Nation",
+            "State",
+            "Airlines",
+            "Flight Seconds",
+            "Seats",
+        ],
+    )
+    flights = table.drop_columns(["Airlines"]).to_pandas(date_as_object=False)
+    flights["Seat Seconds"] = (
+        flights["Seats"].astype("float64") * flights["Flight Seconds"]
+    )
+    flights["Prime Airline"] = pc.list_element(
+        table["Airlines"], 0
+    ).to_pandas()
+    cube = (
+        flights.groupby(DIMENSIONS, dropna=False)
+        .agg(
+            Flights=("Flight Seconds", "size"),
+            **{
+                "Flight Seconds": ("Flight Seconds", "sum"),
+                "Seat Seconds": ("Seat Seconds", "sum"),
+            },
+        )
+        .reset_index()
+    )
+    cube.insert(0, "Day", day)
+    return cube
+
+
+def read_cube_file(path):
+    # Returns (cube, {day: fingerprint of the day file it was built from})
+    if not os.path.exists(path):
+        return None, {}
+    table = pq.read_table(path)
+    if table.column_names != ["Day", *DIMENSIONS, *MEASURES]:
+        return None, {}  # an older layout, rebuild
+    built_from = json.loads(table.schema.metadata[b"days"])
+    return table.to_pandas(date_as_object=False), built_from
+
+
+def empty_cube():
+    # An empty cube, for an airport without any flights yet
+    cube = pd.DataFrame(columns=["Day", *DIMENSIONS, *MEASURES])
+    cube["Date"] = pd.to_datetime(cube["Date"])
+    return cube.astype(
+        {
+            "Flights": "int64",
+            "Flight Seconds": "int64",
+            "Seat Seconds": "float64",
+        }
+    )
+
+
+def update_cube(
+    airport=DEFAULT_AIRPORT, dataset=FLIGHTS_DATASET, cube_dir=CUBE_DIR
+):
+    """Bring the airport's cube up to date with the flights dataset.
+
+    Returns:
+        DataFrame with a "Day" column naming the day file each row came
+        from, the DIMENSIONS columns and the MEASURES columns
+    """
+    sources = day_files(airport, dataset)
+    path = cube_path(airport, cube_dir)
+    cube, built_from = read_cube_file(path)
+    current = {day: fingerprint for day, (_, fingerprint) in sources.items()}
+    if cube is not None and built_from == current:
+        return cube
+
+    stale = sorted(
+        day for day in sources if built_from.get(day) != current[day]
+    )
+    parts = [aggregate_day(sources[day][0], day) for day in stale]
+    if cube is not None:
+        # rows of days that are unchanged are kept as they are; days whose
+        # file is gone are dropped
+        unchanged = set(current) - set(stale)
+        parts.insert(0, cube[cube["Day"].isin(unchanged)])
+    if parts:
+        cube = pd.concat(parts, ignore_index=True)
+    else:
+        cube = empty_cube()
+    cube = cube.sort_values(["Day", *DIMENSIONS], ignore_index=True)
+
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"days": json.dumps(current)}
+    )
+    with atomic_write(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+    print(f"Aggregated {len(stale)} days into {path}")
+    return cube
+
+
+def read_cube(airport=DEFAULT_AIRPORT, triturator_rules=None, **kwargs):
+    """Read the up to date flights cube for the airport.
+
+    Args:
+        triturator_rules: rule set for the "Triturator Status" column, see
+            triturators.get_rules()
+        kwargs: passed on to update_cube()
+
+    Returns:
+        DataFrame with the DIMENSIONS columns, "Triturator Status",
+        "Flights", "Flight Hours" and "Seat Hours". Sum the measures over
+        the dimensions a plot doesn't use.
+    """
+    cube = update_cube(airport, **kwargs).drop(columns="Day")
+    cube["Triturator Status"] = classify(cube, triturator_rules)
+    cube["Flight Hours"] = cube.pop("Flight Seconds") / 3600
+    cube["Seat Hours"] = cube.pop("Seat Seconds") / 3600
+    return cube
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Daily and weekly flight series per terminal or per triturator.
+
+The series are summed from the flights cube (see flight_cube.py) onto a
+complete grid of days, so days without flights are zeros rather than
+gaps, and the rolling means of every group are computed together in one
+grouped pass. Days without a day file (arrivals that were never
+downloaded or failed to ingest) are NaN instead, so rolling means and
+weekly sums that span them are missing rather than low. Each date range
+is cached under CACHE_DIR and only rebuilt when one of the day files it
+covers changes.
+
+Wastewater samples integrate over the days before they are collected, so
+sampled_series() picks out the rolling means of the windows that end on
+each sampling day.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from arrivals import DEFAULT_AIRPORT
+from flight_cube import day_files, read_cube
+from flights import FLIGHTS_CACHE_DIR
+from triturators import UNKNOWN, get_rules
+from util import atomic_write
+
+CACHE_DIR = os.path.join(FLIGHTS_CACHE_DIR, "flight_series")
+GROUPINGS = ["Terminal", "Triturator Status"]
+MEASURES = ["Flights", "Flight Hours", "Seat Hours"]
+DEFAULT_WINDOW = 7
+# Bumped when the series are built differently, so older caches are rebuilt
+SERIES_VERSION = 2
+
+
+def rolling_column(measure, window):
+    return f"{measure} {window}-Day Mean"
+
+
+def series_path(airport, by, first_day, last_day, window, cache_dir):
+    slug = by.lower().replace(" ", "_")
+    return os.path.join(
+        cache_dir,
+        f"{airport}-{slug}-{first_day}-{last_day}-{window}d.parquet",
+    )
+
+
+def cache_key(files, by, first_day, last_day, triturator_rules):
+    # Arrival dates can fall a day either side of the day file they were
+    # read from, so the neighbouring day files count too.
+    first = (first_day - timedelta(days=1)).isoformat()
+    last = (last_day + timedelta(days=1)).isoformat()
+    key = {
+        "version": SERIES_VERSION,
+        "days": {
+            day: fingerprint
+            for day, (_, fingerprint) in files.items()
+            if first <= day <= last
+        },
+    }
+    if by == "Triturator Status":
+        key["rules"] = hashlib.sha1(
+            repr(get_rules(triturator_rules)).encode()
+        ).hexdigest()
+    return key
+
+
+def build_daily_series(cube, by, first_day, last_day, window, days):
+    # days: the days that have a day file. Only they are zero-filled; the
+    # other days are NaN, even if flights from a neighbouring day file
+    # arrived on them.
+    dates = pd.date_range(first_day, last_day, freq="D", unit="ms")
+    cube = cube[cube["Date"].isin(dates)]
+    totals = cube.fillna({by: UNKNOWN}).groupby([by, "Date"])[MEASURES].sum()
+    grid = pd.MultiIndex.from_product(
+        [sorted(totals.index.unique(by)), dates], names=[by, "Date"]
+    )
+    daily = totals.reindex(grid, fill_value=0).astype("float64")
+    covered = grid.get_level_values("Date").isin(pd.to_datetime(list(days)))
+    daily.loc[~covered] = float("nan")
+    rolling = (
+        daily.groupby(level=by, sort=False)
+        .rolling(window, min_periods=window)
+        .mean()
+        .droplevel(0)
+    )
+    rolling.columns = [rolling_column(measure, window) for measure in MEASURES]
+    return daily.join(rolling).reset_index()
+
+
+def daily_series(
+    by="Terminal",
+    first_day=None,
+    last_day=None,
+    window=DEFAULT_WINDOW,
+    airport=DEFAULT_AIRPORT,
+    triturator_rules=None,
+    cache_dir=CACHE_DIR,
+):
+    """Return one row per day and group, with rolling means.
+
+    Args:
+        by: one of GROUPINGS
+        first_day, last_day: dates, inclusive; default to the first and
+            last day in the flights dataset
+        window: days in each rolling mean. The first window - 1 days of
+            the range have no mean, so start the range that much early
+            when the means should cover first_day. Windows that include
+            a day without a day file have no mean either.
+        triturator_rules: rule set for by="Triturator Status", see
+            triturators.get_rules()
+
+    Returns:
+        DataFrame with by, "Date", the MEASURES columns and, for each of
+        them, a rolling_column(measure, window) column. Days without a
+        day file are NaN.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Can't build series by {by!r}, only {GROUPINGS}")
+    files = day_files(airport)
+    if first_day is None or last_day is None:
+        days = sorted(files)
+        if not days:
+            raise ValueError(f"No flights for {airport}")
+        first_day = first_day or date.fromisoformat(days[0])
+        last_day = last_day or date.fromisoformat(days[-1])
+
+    path = series_path(airport, by, first_day, last_day, window, cache_dir)
+    key = cache_key(files, by, first_day, last_day, triturator_rules)
+    if os.path.exists(path):
+        table = pq.read_table(path)
+        if json.loads(table.schema.metadata[b"key"]) == key:
+            return table.to_pandas()
+
+    cube = read_cube(airport, triturator_rules)
+    series = build_daily_series(cube, by, first_day, last_day, window, files)
+    table = pa.Table.from_pandas(series, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"key": json.dumps(key)}
+    )
+    with atomic_write(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+    return series
+
+
+def weekly_series(by="Terminal", week_ending="SUN", **kwargs):
+    """Sum daily_series() into weeks ending on week_ending.
+
+    Pass the weekday samples are collected on as week_ending to line the
+    weeks up with sampling. Partial weeks at either end of the range are
+    summed over the days they have; weeks with a day without a day file
+    are NaN.
+
+    Returns:
+        DataFrame with by, "Week Ending" and the MEASURES columns
+    """
+    daily = daily_series(by, **kwargs)
+    weeks = daily.groupby(
+        [by, pd.Grouper(key="Date", freq=f"W-{week_ending}")]
+    )[MEASURES]
+    return (
+        weeks.sum()
+        .mask(weeks.count().lt(weeks.size(), axis=0))
+        .reset_index()
+        .rename(columns={"Date": "Week Ending"})
+    )
+
+
+def sampled_series(
+    sampling_days, by="Terminal", window=DEFAULT_WINDOW, **kwargs
+):
+    """Return the rolling means of the windows ending on each sampling day.
+
+    The range covers the window before the first sampling day, so every
+    sampling day in the dataset has a mean.
+
+    Returns:
+        DataFrame like daily_series(), with only the sampling days' rows
+    """
+    sampling_days = sorted(sampling_days)
+    daily = daily_series(
+        by,
+        first_day=sampling_days[0] - timedelta(days=window - 1),
+        last_day=sampling_days[-1],
+        window=window,
+        **kwargs,
+    )
+    return daily[daily["Date"].isin(pd.to_datetime(sampling_days))]
+
+
+def start():
+    parser = argparse.ArgumentParser(
+        description="Write daily flight series per terminal or triturator."
+    )
+    parser.add_argument("--by", choices=GROUPINGS, default="Terminal")
+    parser.add_argument("--first-day", type=date.fromisoformat)
+    parser.add_argument("--last-day", type=date.fromisoformat)
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--airport", default=DEFAULT_AIRPORT)
+    parser.add_argument(
+        "--weekly",
+        metavar="WEEKDAY",
+        help="sum into weeks ending on this weekday, e.g. MON",
+    )
+    parser.add_argument("--output", default="flight_series.tsv")
+    args = parser.parse_args()
+
+    kwargs = dict(
+        first_day=args.first_day,
+        last_day=args.last_day,
+        window=args.window,
+        airport=args.airport,
+    )
+    if args.weekly:
+        series = weekly_series(args.by, args.weekly.upper(), **kwargs)
+    else:
+        series = daily_series(args.by, **kwargs)
+    series.to_csv(args.output, sep="\t", index=False)
+
+
+if __name__ == "__main__":
+    start()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Readers for the flight data produced by get-all-flights.py."""
+
+import ast
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from util import atomic_write, fingerprint
+
+# Written by get-all-flights.py, one file per day under
+# airport=XXX/month=YYYY-MM/
+FLIGHTS_DATASET = "data/all_flights.parquet"
+ALL_FLIGHTS_TSV = "all_flights.tsv"
+# Parsed copies of all_flights TSVs, see load_flights()
+FLIGHTS_CACHE_DIR = "data/cache"
+
+
+def read_flights(
+    columns=None, months=None, airports=None, dataset=FLIGHTS_DATASET
+):
+    """Read flights from the airport- and month-partitioned Parquet dataset.
+
+    Args:
+        columns: columns to load, e.g. ["Nation", "State", "Flight Seconds"];
+            all columns if None
+        months: months to load as "YYYY-MM" strings; all months if None
+        airports: arrival airport codes to load, e.g. ["BOS"]; all airports
+            if None. Read the "airport" column to tell them apart.
+        dataset: path to the dataset root
+
+    Returns:
+        DataFrame with one row per included flight. "Flight Seconds" is an
+        integer duration and "Airlines" a list of airline names.
+    """
+    filters = []
+    if months is not None:
+        filters.append(("month", "in", list(months)))
+    if airports is not None:
+        filters.append(("airport", "in", list(airports)))
+    table = pq.read_table(
+        dataset,
+        columns=columns,
+        filters=filters or None,
+        partitioning="hive",
+    )
+    df = table.to_pandas(date_as_object=False)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def parse_date(raw_date):
+    try:
+        return datetime.strptime(raw_date, "%Y-%m-%d")
+    except ValueError:
+        return datetime.strptime(raw_date, "%B %d, %Y")
+
+
+# str(timedelta): "[-]D day[s], " before H:MM:SS[.ffffff] when there are days
+TIMEDELTA_PATTERN = (
+    r"^\s*(?:(?P<days>-?\d+) days?, )?"
+    r"(?P<hours>\d+):(?P<minutes>\d\d):(?P<seconds>\d\d(?:\.\d+)?)\s*$"
+)
+
+
+def parse_flight_times(flight_times):
+    """Convert str(timedelta) flight times to seconds.
+
+    Handles day components and negative durations ("-1 day, 23:00:00" is
+    -3600). Values that aren't timedeltas become NaN.
+    """
+    values = pd.Series(flight_times.unique())
+    parts = values.str.extract(TIMEDELTA_PATTERN).astype("float64")
+    seconds = (
+        parts["days"].fillna(0) * 86400
+        + parts["hours"] * 3600
+        + parts["minutes"] * 60
+        + parts["seconds"]
+    )
+    unparsed = values[seconds.isna()]
+    if len(unparsed):
+        print(
+            f"conversion of {len(unparsed)} flight times failed, "
+            f"e.g. {unparsed.iloc[0]!r}"
+        )
+    return flight_times.map(dict(zip(values, seconds))).astype("float64")
+
+
+def parse_all_flights_tsv(path):
+    df = pd.read_csv(path, sep="\t", dtype=str, keep_default_na=False)
+    # Each distinct value is only parsed once
+    airlines = {
+        airline: ast.literal_eval(airline)
+        for airline in df["Airline"].unique()
+    }
+    dates = {
+        raw_date: parse_date(raw_date) for raw_date in df["Date"].unique()
+    }
+    df["Date"] = pd.to_datetime(df["Date"].map(dates))
+    df["Airlines"] = df["Airline"].map(airlines)
+    df["Prime Airline"] = df["Airline"].map(
+        {airline: names[0] for airline, names in airlines.items()}
+    )
+    if "Flight Seconds" in df.columns:
+        df["Flight Seconds"] = pd.to_numeric(df["Flight Seconds"])
+    else:
+        # written before get-all-flights.py had a numeric column
+        df["Flight Seconds"] = parse_flight_times(df["Flight Time"])
+    df["Flight Hours"] = df["Flight Seconds"] / 3600
+    if "Seats" in df.columns:
+        df["Seats"] = pd.to_numeric(df["Seats"], errors="coerce").astype(
+            "Int64"
+        )
+        df["Seat Hours"] = df["Seats"] * df["Flight Hours"]
+    return df
+
+
+def load_flights(path=ALL_FLIGHTS_TSV, cache_dir=FLIGHTS_CACHE_DIR):
+    """Load an all_flights TSV as a typed table.
+
+    The parsed table is cached as Parquet next to the other data and reused
+    for as long as the TSV's mtime and size are unchanged.
+
+    Returns:
+        DataFrame with the TSV's columns, where "Date" is a datetime, plus
+        "Airlines" (list of airline names), "Prime Airline" (the first of
+        them) and "Flight Hours" (float). "Flight Seconds" is read from the
+        TSV, or parsed from "Flight Time" in files that predate it. TSVs
+        with a "Seats" column also get "Seat Hours", <NA> where the
+        equipment is unknown.
+    """
+    source = fingerprint(path)
+    cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}.parquet")
+    if os.path.exists(cache_path):
+        metadata = pq.read_schema(cache_path).metadata or {}
+        if json.loads(metadata.get(b"source", b"null")) == source:
+            df = pq.read_table(cache_path).to_pandas()
+            df["Airlines"] = df["Airlines"].map(list)
+            return df
+
+    df = parse_all_flights_tsv(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"source": json.dumps(source)}
+    )
+    with atomic_write(cache_path) as tmp_path:
+        pq.write_table(table, tmp_path)
+    return df
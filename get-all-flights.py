@@ -1,362 +1,798 @@
 #!/usr/bin/env python3
 import pandas as pd
-import subprocess
 import os
-import csv
-from collections import defaultdict
-import matplotlib.pyplot as plt
-from datetime import datetime, date
+from datetime import datetime, date, time, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
-import re
-
-
-def get_time_zones():
-    time_zone_dict = {}
-    with open("time_zones.csv", mode="r", encoding="utf-8") as file:
-        for line in file:
-            location, time_zone = line.split(",")
-            time_zone_dict[location] = time_zone.strip()
-    return time_zone_dict
-
-
-def get_arrivals(day, month, year):
-    if not os.path.exists("flight_data"):
-        os.makedirs("flight_data")
-    flight_data_path = f"data/flight_data/{year}-{month:02d}-{day:02d}.csv"
-    if not os.path.exists(flight_data_path):
-        subprocess.check_call(
-            [
-                "aws",
-                "s3",
-                "cp",
-                f"s3://nao-bostraffic/Data/Arrivals/{year}-{month:02d}-{day:02d}_BOS_Arrivals.csv",
-                flight_data_path,
-            ]
+import shutil
+import argparse
+import ast
+import pyarrow as pa
+import pyarrow.parquet as pq
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from airports import load_airport_index
+from equipment import load_equipment_seats, seats_for
+from quarantine import quarantined_arrivals, record_day, record_failure
+from arrivals import ARRIVALS_SOURCE, DEFAULT_AIRPORT, sync_arrivals
+from util import DEFAULT_WORKERS, atomic_write
+
+
+HEADERS = [
+    "Origin",
+    "Origin Code",
+    "Date",
+    "Terminal",
+    "Equipment",
+    "Flight",
+    "Airline",
+    "Nation",
+    "State",
+    "Flight Time",
+    "Flight Seconds",  # the same duration as a number
+    "Seats",  # typical for the equipment, empty if unknown
+]
+HEADER_LINE = "\t".join(HEADERS) + "\n"
+FIRST_DAY = date(2023, 4, 17)  # first entry in the arrivals bucket
+DAY_OUTPUT_DIR = "data/all_flights"
+# Typed copy of the same rows, partitioned by airport and month, see
+# flights.py
+FLIGHTS_DATASET = "data/all_flights.parquet"
+FLIGHTS_SCHEMA = pa.schema(
+    [
+        ("Origin", pa.string()),
+        ("Origin Code", pa.string()),
+        ("Date", pa.date32()),
+        ("Terminal", pa.string()),
+        ("Equipment", pa.string()),
+        ("Flight", pa.string()),
+        ("Airlines", pa.list_(pa.string())),
+        ("Nation", pa.string()),
+        ("State", pa.string()),
+        ("Flight Seconds", pa.int32()),
+        ("Seats", pa.int16()),
+    ]
+)
+
+
+# Arrival time zones of the monitored airports. Airports not listed here
+# use the time zone from the airport index.
+ARRIVAL_TIME_ZONES = {"BOS": "America/New_York"}
+
+
+def output_stem(airport):
+    # BOS keeps the all_flights.tsv name the analysis scripts read
+    if airport == DEFAULT_AIRPORT:
+        return "all_flights"
+    return f"all_flights_{airport}"
+
+
+def all_flights_tsv(airport):
+    return f"{output_stem(airport)}.tsv"
+
+
+def checkpoint_path(airport):
+    return f"{output_stem(airport)}.checkpoint.json"
+
+
+def stats_report_path(airport):
+    return f"{output_stem(airport)}.stats.json"
+
+
+@dataclass(kw_only=True)
+class IngestStats:
+    """Row counts from ingesting one or more days of arrivals.
+
+    Stats for separate days (or separate runs) combine with merge(), so
+    totals never need another pass over the rows.
+    """
+
+    days: int = 0
+    rows: int = 0
+    included_flights: int = 0
+    flight_exclusions: Counter = field(default_factory=Counter)
+    # rounded flight hours -> number of flights
+    flight_times: Counter = field(default_factory=Counter)
+    missing_airport_codes: Counter = field(default_factory=Counter)
+
+    def merge(self, other):
+        self.days += other.days
+        self.rows += other.rows
+        self.included_flights += other.included_flights
+        self.flight_exclusions.update(other.flight_exclusions)
+        self.flight_times.update(other.flight_times)
+        self.missing_airport_codes.update(other.missing_airport_codes)
+        return self
+
+    def exclusion_rate(self):
+        if self.rows == 0:
+            return 0.0
+        return sum(self.flight_exclusions.values()) / self.rows
+
+    def to_dict(self):
+        return {
+            "days": self.days,
+            "rows": self.rows,
+            "included_flights": self.included_flights,
+            "exclusion_rate": self.exclusion_rate(),
+            "flight_exclusions": dict(self.flight_exclusions),
+            "flight_times": {
+                str(hours): count
+                for hours, count in sorted(self.flight_times.items())
+            },
+            "missing_airport_codes": dict(
+                self.missing_airport_codes.most_common()
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            days=data["days"],
+            rows=data["rows"],
+            included_flights=data["included_flights"],
+            flight_exclusions=Counter(data["flight_exclusions"]),
+            flight_times=Counter(
+                {int(hours): n for hours, n in data["flight_times"].items()}
+            ),
+            missing_airport_codes=Counter(data["missing_airport_codes"]),
         )
-    return flight_data_path
-
-
-def get_state_code_dict():
-    state_code_dict = {}
-    with open("data/state_code_to_name.tsv", mode="r", encoding="utf-8") as file:
-        # source: https://docs.google.com/spreadsheets/d/1wU-Ibw9lOplcBMbCbfhgz3GeDx10yZ7iCQY1uHcMu88/edit#gid=0
-        # skip first line which contains source
-        next(file)
-        csv_reader = csv.DictReader(file, delimiter="\t")
-        for row in csv_reader:
-            state_code_dict[row["state_code"]] = row["state_name"]
-    return state_code_dict
-
-def get_minor_airport_codes():
-    minor_airport_codes = {}
-    with open("data/minor_airports.tsv", mode="r", encoding="utf-8") as file:
-        for line in file:
-            airport, location = line.split("\t")
-            minor_airport_codes[airport] = location.strip()
-    return minor_airport_codes
-
-def get_airport_codes():
-    non_us_codes = defaultdict(tuple)
-    us_codes = defaultdict(tuple)
-    with open(
-        # source: https://docs.google.com/spreadsheets/u/1/d/1eepIWOHicQsLyZsb0mSXGPTXDp3vlql-aGuy1AWJED0/htmlview#
-        # TODO: Use official IATA data, this sheet has a couple of mistakes
-        # that I have to account for below
-        "data/Airport Codes by Country - Airport Codes List .tsv",
-        mode="r",
-        encoding="utf-8",
-    ) as file:
-        csv_reader = csv.DictReader(file, delimiter="\t")
-        for row in csv_reader:
-            fine_location, location, airport_code = (
-                row["City"],
-                row["Country "],  # note the space at the end of the key
-                row["Code"],
-            )
-            if location == "USA":
-                try:
-                    if airport_code == "DCA":
-                        city = "Washington"
-                        state = "DC"
-                    elif airport_code == "SFO":
-                        city = "San Francisco"
-                        state = "CA"
-                    elif airport_code == "IAD":
-                        city = "Washington"
-                        state = "VA"
-                    elif airport_code == "BWI":
-                        city = "Baltimore"
-                        state = "MD"
-                    elif airport_code == "ATL":
-                        city = "Atlanta"
-                        state = "GA"
-                    elif airport_code == "BUF":
-                        city = "Buffalo"
-                        state = "NY"
-                    elif airport_code == "SJU":
-                        city = "San Juan"
-                        state = "PR"
-                    elif airport_code == "IAG":
-                        city = "Niagara Falls"
-                        state = "NY"
-                    elif airport_code == "TRI":
-                        city = "Blountville"
-                        state = "TN"
-                    else:
-                        bits = fine_location.split(", ")
-                        city = bits[0]
-                        state = bits[-1]
-                        state = state.split(" ")[0]
-                except:
-                    continue
-                us_codes[airport_code] = state
+
+
+def write_json(data, path):
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as outf:
+        json.dump(data, outf, indent=2)
+
+
+def get_days(first_day=FIRST_DAY, last_day=None):
+    # Up to today by default; there are no arrivals files after it yet
+    last_day = min(date.today(), last_day or date.today())
+    day = first_day
+    while day <= last_day:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_output_path(airport, day):
+    return os.path.join(DAY_OUTPUT_DIR, airport, f"{day.isoformat()}.tsv")
+
+
+def day_stats_path(airport, day):
+    return os.path.join(
+        DAY_OUTPUT_DIR, airport, f"{day.isoformat()}.stats.json"
+    )
+
+
+def day_parquet_path(airport, day):
+    return os.path.join(
+        FLIGHTS_DATASET,
+        f"airport={airport}",
+        f"month={day:%Y-%m}",
+        f"{day.isoformat()}.parquet",
+    )
+
+
+def has_current_columns(path):
+    # Day files written before a column was added have to be redone. An
+    # empty day file fits any layout.
+    with open(path) as inf:
+        line = inf.readline()
+    return not line or line.count("\t") == len(HEADERS) - 1
+
+
+def is_materialized(airport, day):
+    return all(
+        os.path.exists(path)
+        for path in [
+            day_output_path(airport, day),
+            day_parquet_path(airport, day),
+            day_stats_path(airport, day),
+        ]
+    ) and has_current_columns(day_output_path(airport, day))
+
+
+def materialized_days(airport):
+    # Every day on disk, not only those in this run's date range
+    try:
+        file_names = os.listdir(os.path.join(DAY_OUTPUT_DIR, airport))
+    except FileNotFoundError:
+        return []
+    days = [
+        date.fromisoformat(file_name[: -len(".tsv")])
+        for file_name in file_names
+        if file_name.endswith(".tsv")
+    ]
+    return sorted(day for day in days if is_materialized(airport, day))
+
+
+DATETIME_FORMATS = ["%Y-%m-%d %H:%M", "%B %d, %Y %H:%M"]
+MAX_FLIGHT_SECONDS = 19 * 3600
+
+
+def parse_datetimes(values):
+    # Try each format on the whole column and only hand the rows it could
+    # not parse to the next one; whatever is left goes through strptime so
+    # that odd-but-valid values (e.g. unpadded hours) still parse.
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATETIME_FORMATS:
+        unparsed = parsed.isna()
+        if not unparsed.any():
+            break
+        parsed[unparsed] = pd.to_datetime(
+            values[unparsed], format=fmt, errors="coerce"
+        )
+    for index in parsed.index[parsed.isna()]:
+        for fmt in DATETIME_FORMATS:
+            try:
+                parsed[index] = datetime.strptime(values[index], fmt)
+                break
+            except ValueError:
                 continue
-            else:
-                if airport_code == "SJU":
-                    city = "San Juan"
-                    state = "PR"
-                    us_codes[airport_code] = state
-                    continue
-                if "," in location:
-                    country = location.split(", ")[1]
-                else:
-                    country = location
-                non_us_codes[airport_code] = country
-
-    return us_codes, non_us_codes
-
-
-def create_all_flights_tsv():
-    us_codes, non_us_codes = get_airport_codes()
-    minor_airports = get_minor_airport_codes()
-    state_code_dict = get_state_code_dict()
-    time_zone_dict = get_time_zones()
-
-    month_range = range(1, 13)
-    day_range = range(1, 32)
-    years = [2023, 2024]
-    headers = [
-        "Origin",
-        "Origin Code",
-        "Date",
-        "Terminal",
-        "Equipment",
-        "Flight",
-        "Airline",
-        "Nation",
-        "State",
-        "Flight Time",
+    return parsed
+
+
+@lru_cache(maxsize=None)
+def day_utc_offset(zone, day):
+    # The UTC offset in seconds that holds for the whole of day in zone, or
+    # None on the days the zone changes offset
+    tz = ZoneInfo(zone)
+    first, last = (
+        datetime.combine(day, moment, tzinfo=tz).utcoffset()
+        for moment in (time.min, time.max)
+    )
+    return int(first.total_seconds()) if first == last else None
+
+
+def utc_offsets(local_datetimes, time_zones):
+    # Offsets come from a (zone, date) table that each worker fills as it
+    # meets new dates, so zoneinfo is consulted once per zone and day rather
+    # than once per row. Local times on days a zone changes offset are
+    # resolved one by one, which gives the same answer as
+    # datetime.replace(tzinfo=ZoneInfo(zone)).
+    keys = pd.DataFrame(
+        {
+            "zone": time_zones.to_numpy(),
+            "day": local_datetimes.dt.normalize().to_numpy(),
+        }
+    )
+    table = keys.drop_duplicates()
+    table["offset"] = [
+        day_utc_offset(zone, day.date())
+        for zone, day in table.itertuples(index=False)
     ]
-    missing_airport_codes = defaultdict(int)
-    flight_times = defaultdict(int)
-    flight_exclusions = defaultdict(int)
-    included_flights = 0
-
-    with open("all_flights.tsv", "w", newline="") as outf:
-        writer = csv.writer(outf, delimiter="\t", lineterminator="\n")
-        writer.writerow(headers)
-        for year in years:
-            for month in month_range:
-                for day in day_range:
-                    if month == 2 and day > 28:
-                        continue
-                    if month in [4, 6, 9, 11] and day == 31:
-                        continue
-                    if date(year, month, day) < date(2023, 4, 17):
-                        continue
-                    today = date.today()
-                    if today < date(year, month, day):
-                        break
-                    try:
-                        flight_data_path = get_arrivals(day, month, year)
-                    except:
-                        print(f"no data for {year}-{month}-{day}")
-                        continue
-
-                    with open(flight_data_path, newline="") as csvfile:
-                        reader = csv.DictReader(csvfile)
-
-                        for row in reader:
-                            origin = row["Origin"]
-                            airport_code = row["Origin Code"]
-                            dep_time = row["Departure Time"]
-                            arr_time = row["Arrival Time"]
-                            dep_date = row["Departure Date"]
-                            arr_date = row["Arrival Date"]
-                            scheduled_arr_time = row["Scheduled Arrival Time"]
-                            scheduled_arr_date = row["Scheduled Arrival Date"]
-                            terminal = row["Terminal"]
-                            equipment = row["Equipment"]
-                            flight = row["Flight"]
-                            airline = row["Airline"]
-                            status = row["Status"]
-                            if "DIVERTED" in status:
-                                flight_exclusions["Diverted"] += 1
-                                continue
-                            elif "Canceled" in status:
-                                flight_exclusions["Canceled"] += 1
-                                continue
-                            elif "En Route" in status:
-                                flight_exclusions["En Route"] += 1
-                                continue
-                            elif "Unknown" in status:
-                                if (
-                                    arr_time == scheduled_arr_time
-                                    and arr_date == scheduled_arr_date
-                                ):
-                                    pass # flight seems fine
-                                else:
-                                    flight_exclusions["Unknown status, irregular arrival time"] += 1
-                                    continue # Requires further investigation #FIXME #BUG
-                            if airport_code in us_codes:
-                                location = us_codes[airport_code]
-                                if location == "La":
-                                    location = "LA"
-                                try:
-                                    state = state_code_dict[location]
-                                except:
-                                    state = None
-                                country = "United States"
-                            elif airport_code in non_us_codes:
-                                location = non_us_codes[airport_code]
-                                country = location
-                                state = None
-                            elif (
-                                airport_code not in us_codes
-                                and airport_code not in non_us_codes
-                            ):
-                                try:
-                                    location = minor_airports[
-                                        airport_code
-                                    ]
-                                    if location in state_code_dict:
-                                        state = state_code_dict[location]
-                                        country = "United States"
-                                    else:
-                                        country = location
-                                        state = None
-                                except:
-                                    print(f"Missing airport code: {airport_code}")
-                                    missing_airport_codes[airport_code] += 1
-                                    flight_exclusions[
-                                        "Missing Airport Code"
-                                    ] += 1
-                                    continue
-                            #try:
-                            #    arr_date = datetime.strptime(arr_date, "%Y-%m-%d")
-                            #except:
-                            #    arr_date = datetime.strptime(arr_date, "%B %d, %Y")
-                            if not arr_time:
-                                flight_exclusions[
-                                    "No Arrival Time provided"
-                                ] += 1
-                                continue
-
-                            try:
-                                raw_departure_datetime = datetime.strptime(
-                                    f"{dep_date} {dep_time}", "%Y-%m-%d %H:%M"
-                                )
-                            except:
-                                try:
-                                    raw_departure_datetime = datetime.strptime(
-                                        f"{dep_date} {dep_time}", "%B %d, %Y %H:%M"
-                                    )
-                                except Exception as e:
-                                    print(f"Error parsing departure time: {dep_date} {dep_time}")
-                                    print(e)
-
-
-
-                            if state is not None:
-                                departure_time_zone = time_zone_dict[state]
-                            else:
-                                departure_time_zone = time_zone_dict[country]
-
-                            tz_adjusted_departure_datetime = (
-                                raw_departure_datetime.replace(
-                                    tzinfo=ZoneInfo(departure_time_zone)
-                                )
-                            )
-
-                            try:
-                                raw_arrival_datetime = datetime.strptime(
-                                    f"{arr_date} {arr_time}", "%Y-%m-%d %H:%M"
-                                )
-                            except:
-                                try:
-                                    raw_arrival_datetime = datetime.strptime(
-                                        f"{arr_date} {arr_time}", "%B %d, %Y %H:%M"
-                                    )
-                                except Exception as e:
-                                    print(f"Error parsing arrival time: {arr_date} {arr_time}")
-                                    print(e)
-                            tz_adjusted_arrival_datetime = (
-                                raw_arrival_datetime.replace(
-                                    tzinfo=ZoneInfo("America/New_York")
-                                )
-                            )
-
-                            flight_time = (
-                                tz_adjusted_arrival_datetime
-                                - tz_adjusted_departure_datetime
-                            )
-                            raw_flight_time = (
-                                raw_arrival_datetime - raw_departure_datetime
-                            )
-                            flight_hours = flight_time.total_seconds() / 3600
-                            if flight_hours < 0:
-                                flight_exclusions["Negative Flight Time"] += 1
-                                continue
-                            if flight_hours > 19:
-                                flight_exclusions[
-                                    "Flight Time longer than 19 hours"
-                                ] += 1
-                                continue
-                            included_flights += 1
-                            flight_hours = round(flight_hours)
-                            flight_times[flight_hours] += 1
-                            writer.writerow(
-                                [
-                                    origin,
-                                    airport_code,
-                                    arr_date,
-                                    terminal,
-                                    equipment,
-                                    flight,
-                                    airline,
-                                    country,
-                                    state,
-                                    flight_time,
-                                ]
-                            )
-    print(f"\nExcluded flights: Total {sum(flight_exclusions.values())}")
-    for key, value in flight_exclusions.items():
-        print(f"{key}: {value}")
-    print(f"\nIncluded flights: {included_flights}")
+    offsets = pd.Series(
+        keys.merge(table, how="left")["offset"].to_numpy(dtype="float64"),
+        index=local_datetimes.index,
+    )
+    for (zone, local_datetime), group in local_datetimes[
+        offsets.isna()
+    ].groupby([time_zones, local_datetimes]):
+        offsets[group.index] = (
+            local_datetime.to_pydatetime()
+            .replace(tzinfo=ZoneInfo(zone))
+            .utcoffset()
+            .total_seconds()
+        )
+    return offsets.astype("int64")
+
+
+def format_flight_time(seconds):
+    # Same text as the str(timedelta) the TSV has always had
+    return seconds.map(
+        {
+            value: str(timedelta(seconds=int(value)))
+            for value in seconds.unique()
+        }
+    )
+
+
+def parse_date(raw_date):
+    try:
+        return datetime.strptime(raw_date, "%Y-%m-%d").date()
+    except ValueError:
+        return datetime.strptime(raw_date, "%B %d, %Y").date()
+
+
+def write_day_parquet(airport, day, flights):
+    airlines = {
+        airline: ast.literal_eval(airline)
+        for airline in flights["Airline"].unique()
+    }
+    dates = {
+        arr_date: parse_date(arr_date) for arr_date in flights["Date"].unique()
+    }
+    columns = {
+        "Origin": flights["Origin"],
+        "Origin Code": flights["Origin Code"],
+        "Date": flights["Date"].map(dates),
+        "Terminal": flights["Terminal"],
+        "Equipment": flights["Equipment"],
+        "Flight": flights["Flight"],
+        "Airlines": flights["Airline"].map(airlines),
+        "Nation": flights["Nation"],
+        "State": flights["State"],
+        "Flight Seconds": flights["Flight Seconds"],
+        "Seats": flights["Seats"],
+    }
+    table = pa.Table.from_pydict(
+        {
+            name: column.astype(object).where(column.notna(), None).tolist()
+            for name, column in columns.items()
+        },
+        schema=FLIGHTS_SCHEMA,
+    )
+
+    parquet_path = day_parquet_path(airport, day)
+    # dot-prefixed so dataset readers never pick up a half-written file
+    tmp_path = os.path.join(
+        os.path.dirname(parquet_path), f".{os.path.basename(parquet_path)}"
+    )
+    with atomic_write(parquet_path, tmp_path):
+        pq.write_table(table, tmp_path)
+
+
+def read_arrivals(flight_data_path):
+    return pd.read_csv(flight_data_path, dtype=str, keep_default_na=False)
+
+
+def parse_arrivals(arrivals, airport_index, arrival_zone):
+    """Parse arrivals CSV rows into flights.
+
+    Returns:
+        (flights, stats, quarantined) where quarantined holds the rows
+        that were excluded, or kept but flagged, with their reason and
+        original row; see quarantine.record_day()
+    """
+    status = arrivals["Status"]
+    arr_time = arrivals["Arrival Time"]
+    arr_date = arrivals["Arrival Date"]
 
-    flight_times = dict(
-        sorted(
-            flight_times.items(),
-            key=lambda item: item[0],
+    # Exclusion reasons in the order the checks apply; the first one that
+    # matches a row is the one it is counted under.
+    exclusion = pd.Series(None, index=arrivals.index, dtype=object)
+
+    def exclude(reason, mask):
+        exclusion[mask & exclusion.isna()] = reason
+
+    exclude("Diverted", status.str.contains("DIVERTED", regex=False))
+    exclude("Canceled", status.str.contains("Canceled", regex=False))
+    exclude("En Route", status.str.contains("En Route", regex=False))
+    exclude(
+        # Requires further investigation #FIXME #BUG
+        "Unknown status, irregular arrival time",
+        status.str.contains("Unknown", regex=False)
+        & ~(
+            (arr_time == arrivals["Scheduled Arrival Time"])
+            & (arr_date == arrivals["Scheduled Arrival Date"])
+        ),
+    )
+
+    missing = ~arrivals["Origin Code"].isin(airport_index.keys())
+    missing_airport_codes = arrivals["Origin Code"][
+        missing & exclusion.isna()
+    ].value_counts()
+    exclude("Missing Airport Code", missing)
+    exclude("No Arrival Time provided", arr_time == "")
+
+    candidates = exclusion.isna()
+    departures = parse_datetimes(
+        arrivals["Departure Date"][candidates]
+        + " "
+        + arrivals["Departure Time"][candidates]
+    ).reindex(arrivals.index)
+    arrivals_local = parse_datetimes(
+        arr_date[candidates] + " " + arr_time[candidates]
+    ).reindex(arrivals.index)
+    exclude("Unparseable Departure Time", departures.isna())
+    exclude("Unparseable Arrival Time", arrivals_local.isna())
+
+    # One index lookup per row gives (country, state, time zone)
+    locations = arrivals["Origin Code"].map(airport_index).astype(object)
+    exclude("Missing Time Zone", locations.str[2].isna())
+
+    included = exclusion.isna()
+    country = locations.str[0][included]
+    state = locations.str[1][included]
+    departure_zones = locations.str[2][included]
+    # Aware datetimes sharing a tzinfo subtract as wall-clock times, and
+    # ZoneInfo instances are cached per key, so flights from the arrival
+    # zone have always been plain local differences. Only flights across
+    # zones need offsets.
+    cross_zone = departure_zones != arrival_zone
+    departure_offsets = utc_offsets(
+        departures[included][cross_zone], departure_zones[cross_zone]
+    )
+    arrival_offsets = utc_offsets(
+        arrivals_local[included][cross_zone],
+        pd.Series(arrival_zone, index=departure_offsets.index),
+    )
+    flight_seconds = (
+        (arrivals_local[included] - departures[included]).dt.total_seconds()
+        - arrival_offsets.reindex(departure_zones.index, fill_value=0)
+        + departure_offsets.reindex(departure_zones.index, fill_value=0)
+    ).astype("int64")
+    exclude(
+        "Negative Flight Time",
+        (flight_seconds < 0).reindex(exclusion.index, fill_value=False),
+    )
+    exclude(
+        "Flight Time longer than 19 hours",
+        (flight_seconds > MAX_FLIGHT_SECONDS).reindex(
+            exclusion.index, fill_value=False
+        ),
+    )
+
+    # Kept, but in the same unexplained state as the excluded ones
+    flagged = exclusion.isna() & status.str.contains("Unknown", regex=False)
+    quarantined = pd.DataFrame(
+        {
+            "Flight": arrivals["Flight"],
+            "Reason": exclusion.where(
+                ~flagged, "Unknown status, arrival time as scheduled"
+            ),
+            "Excluded": exclusion.notna(),
+        }
+    )[exclusion.notna() | flagged]
+    quarantined["Row"] = [
+        json.dumps(row)
+        for row in arrivals.loc[quarantined.index].to_dict("records")
+    ]
+
+    kept = exclusion.isna()[flight_seconds.index]
+    flight_seconds = flight_seconds[kept]
+    included = exclusion.isna()
+    flights = pd.DataFrame(
+        {
+            "Origin": arrivals["Origin"][included],
+            "Origin Code": arrivals["Origin Code"][included],
+            "Date": arr_date[included],
+            "Terminal": arrivals["Terminal"][included],
+            "Equipment": arrivals["Equipment"][included],
+            "Flight": arrivals["Flight"][included],
+            "Airline": arrivals["Airline"][included],
+            "Nation": country[kept],
+            "State": state[kept],
+            "Flight Time": format_flight_time(flight_seconds),
+            "Flight Seconds": flight_seconds,
+        }
+    )
+
+    stats = IngestStats(
+        days=1,
+        rows=len(arrivals),
+        included_flights=len(flights),
+        flight_exclusions=Counter(exclusion.value_counts().to_dict()),
+        flight_times=Counter(
+            (flight_seconds / 3600)
+            .round()
+            .astype(int)
+            .value_counts()
+            .to_dict()
+        ),
+        missing_airport_codes=Counter(missing_airport_codes.to_dict()),
+    )
+    return flights, stats, quarantined
+
+
+_worker_airport_index = None
+_worker_equipment_seats = None
+
+
+def _init_worker(airport_index, equipment_seats):
+    global _worker_airport_index, _worker_equipment_seats
+    _worker_airport_index = airport_index
+    _worker_equipment_seats = equipment_seats
+
+
+def arrival_time_zone(airport, airport_index):
+    if airport in ARRIVAL_TIME_ZONES:
+        return ARRIVAL_TIME_ZONES[airport]
+    location = airport_index.get(airport)
+    if location is None or location[2] is None:
+        raise ValueError(f"No time zone known for {airport}")
+    return location[2]
+
+
+def ingest_day(airport, day, flight_data_path):
+    # Runs in a worker process: parse one day of arrivals and write the
+    # day's rows to their own file so later runs can skip it.
+    flights, stats, quarantined = parse_arrivals(
+        read_arrivals(flight_data_path),
+        _worker_airport_index,
+        arrival_time_zone(airport, _worker_airport_index),
+    )
+    flights["Seats"] = seats_for(flights["Equipment"], _worker_equipment_seats)
+    # Only a complete day file counts as materialized, so it replaces the
+    # old one after everything else the day writes.
+    with atomic_write(day_output_path(airport, day)) as tmp_path:
+        flights[HEADERS].to_csv(
+            tmp_path, sep="\t", header=False, index=False, lineterminator="\n"
         )
+        write_day_parquet(airport, day, flights)
+        write_json(stats.to_dict(), day_stats_path(airport, day))
+        record_day(airport, day, quarantined)
+    return stats
+
+
+def create_all_flights_tsv(
+    source=ARRIVALS_SOURCE,
+    workers=DEFAULT_WORKERS,
+    rebuild=False,
+    endpoint_url=None,
+    airports=(DEFAULT_AIRPORT,),
+    first_day=FIRST_DAY,
+    last_day=None,
+):
+    airport_index = load_airport_index()
+    for airport in airports:
+        # fail before any work rather than in every worker
+        arrival_time_zone(airport, airport_index)
+
+    days = list(get_days(first_day, last_day))
+    pending = [
+        (airport, day)
+        for airport in airports
+        for day in days
+        if rebuild
+        or day == date.today()  # today's arrivals are still coming in
+        or not is_materialized(airport, day)
+    ]
+    print(
+        f"Ingesting {len(pending)} of {len(days) * len(airports)} "
+        f"airport days with {workers} workers"
+    )
+    # One listing and one pooled S3 session for all missing day files
+    flight_data_paths = sync_arrivals(
+        sorted({day for airport, day in pending}),
+        source,
+        endpoint_url=endpoint_url,
+        airports=airports,
+    )
+    for airport, day in pending:
+        if (airport, day) not in flight_data_paths:
+            print(f"no data for {airport} {day.year}-{day.month}-{day.day}")
+
+    # Days of all airports share one pool
+    ingested = {airport: set() for airport in airports}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(airport_index, load_equipment_seats()),
+    ) as executor:
+        futures = {
+            executor.submit(
+                ingest_day, airport, day, flight_data_paths[airport, day]
+            ): (airport, day)
+            for airport, day in pending
+            if (airport, day) in flight_data_paths
+        }
+        for future in as_completed(futures):
+            airport, day = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"failed to ingest {airport} {day}: {e}")
+                record_failure(airport, day, e)
+                continue
+            ingested[airport].add(day)
+
+    for airport in airports:
+        total_stats = append_all_flights_tsv(airport, ingested[airport])
+        print_stats(airport, total_stats)
+
+
+def load_checkpoint(airport):
+    # {day: [start, end]} byte ranges of the days already in the airport's
+    # all_flights TSV, in date order
+    try:
+        with open(checkpoint_path(airport)) as inf:
+            written = json.load(inf)["days"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return {}
+    if not os.path.exists(all_flights_tsv(airport)):
+        return {}
+    with open(all_flights_tsv(airport)) as inf:
+        if inf.readline() != HEADER_LINE:
+            return {}  # written with other columns, start over
+    # A file shorter than the checkpoint says was truncated or replaced
+    # behind our back; only whole days that are still there can be kept.
+    size = os.path.getsize(all_flights_tsv(airport))
+    return {day: span for day, span in written.items() if span[1] <= size}
+
+
+def load_stats_report(airport):
+    try:
+        with open(stats_report_path(airport)) as inf:
+            return json.load(inf)["days"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return {}
+
+
+def append_all_flights_tsv(airport, ingested_days):
+    """Bring the airport's all_flights TSV up to date with its day files.
+
+    Days already in the file are left alone. Only days after the first
+    day that is new or was re-ingested this run get (re)written, and the
+    checkpoint is updated after each one, so an interrupted run resumes
+    from the last complete day.
+    """
+    written = load_checkpoint(airport)
+    previous_stats = load_stats_report(airport)
+    materialized = materialized_days(airport)
+    to_write = [
+        day
+        for day in materialized
+        if day in ingested_days or day.isoformat() not in written
+    ]
+    first_day = min(to_write).isoformat() if to_write else None
+    written = {
+        day: span
+        for day, span in written.items()
+        if first_day is None or day < first_day
+    }
+
+    header = HEADER_LINE.encode()
+    if written:
+        offset = max(end for start, end in written.values())
+        mode = "r+b"
+    else:
+        offset = len(header)
+        mode = "wb"
+
+    stats_by_day = {
+        day: stats for day, stats in previous_stats.items() if day in written
+    }
+    appended_days = 0
+    with open(all_flights_tsv(airport), mode) as outf:
+        if mode == "wb":
+            outf.write(header)
+        outf.truncate(offset)
+        outf.seek(offset)
+        write_json({"days": written}, checkpoint_path(airport))
+        for day in materialized:
+            if first_day is None or day.isoformat() < first_day:
+                if day.isoformat() not in stats_by_day:
+                    with open(day_stats_path(airport, day)) as inf:
+                        stats_by_day[day.isoformat()] = json.load(inf)
+                continue
+            with open(day_output_path(airport, day), "rb") as inf:
+                shutil.copyfileobj(inf, outf)
+            outf.flush()
+            os.fsync(outf.fileno())
+            written[day.isoformat()] = [offset, outf.tell()]
+            offset = outf.tell()
+            write_json({"days": written}, checkpoint_path(airport))
+            with open(day_stats_path(airport, day)) as inf:
+                stats_by_day[day.isoformat()] = json.load(inf)
+            appended_days += 1
+    print(f"\nAppended {appended_days} days to {all_flights_tsv(airport)}")
+
+    # Totals come from the per-day stats, so days written by earlier runs
+    # are counted without re-reading their rows.
+    total_stats = IngestStats()
+    for day in sorted(stats_by_day):
+        total_stats.merge(IngestStats.from_dict(stats_by_day[day]))
+    write_json(
+        {
+            "total": total_stats.to_dict(),
+            "days": dict(sorted(stats_by_day.items())),
+        },
+        stats_report_path(airport),
     )
+    return total_stats
+
+
+def print_stats(airport, stats):
+    print(f"\n{airport} arrivals")
+    print(f"\nExcluded flights: Total {sum(stats.flight_exclusions.values())}")
+    for key, value in stats.flight_exclusions.most_common():
+        print(f"{key}: {value}")
+    print(f"\nIncluded flights: {stats.included_flights}")
+
     print("\nFlight Time Distribution:")
-    for hour, count in flight_times.items():
+    for hour, count in sorted(stats.flight_times.items()):
         print(f"{hour}: {count}")
 
-    missing_airport_codes = dict(
-        sorted(
-            missing_airport_codes.items(),
-            key=lambda item: item[1],
-            reverse=True,
-        )
+    print(
+        f"\nMissing Airport Codes: {len(stats.missing_airport_codes)} codes, "
+        f"see {stats_report_path(airport)}"
     )
-    print("\nMissing Airport Codes:")
-    for key, value in missing_airport_codes.items():
+    for key, value in stats.missing_airport_codes.most_common(10):
         print(f"{key}: {value}")
 
+
+def reprocess_quarantine(
+    airports, reasons=None, first_day=None, last_day=None
+):
+    # Parse the excluded rows again under the current rules, without
+    # touching the day files, and write the ones that now pass to a
+    # separate TSV for review.
+    airport_index = load_airport_index()
+    equipment_seats = load_equipment_seats()
+    for airport in airports:
+        arrivals = quarantined_arrivals(
+            airport, reasons=reasons, first_day=first_day, last_day=last_day
+        )
+        if arrivals.empty:
+            print(f"No quarantined {airport} rows match")
+            continue
+        flights, stats, _ = parse_arrivals(
+            arrivals, airport_index, arrival_time_zone(airport, airport_index)
+        )
+        flights["Seats"] = seats_for(flights["Equipment"], equipment_seats)
+        output_path = f"{output_stem(airport)}.reprocessed.tsv"
+        flights[HEADERS].to_csv(
+            output_path, sep="\t", index=False, lineterminator="\n"
+        )
+        print_stats(airport, stats)
+        print(f"\nWrote {len(flights)} now included flights to {output_path}")
+
+
 def start():
-    create_all_flights_tsv()
+    parser = argparse.ArgumentParser(
+        description="Build all_flights.tsv from daily arrivals files."
+    )
+    parser.add_argument(
+        "--airport",
+        dest="airports",
+        action="append",
+        help=f"arrival airport code, may be repeated (default "
+        f"{DEFAULT_AIRPORT})",
+    )
+    parser.add_argument(
+        "--first-day",
+        type=date.fromisoformat,
+        default=FIRST_DAY,
+        help=f"first day to ingest, YYYY-MM-DD (default {FIRST_DAY})",
+    )
+    parser.add_argument(
+        "--last-day",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="last day to ingest, YYYY-MM-DD (default today)",
+    )
+    parser.add_argument(
+        "--source",
+        default=ARRIVALS_SOURCE,
+        help="S3 prefix or local directory holding the daily arrivals CSVs",
+    )
+    parser.add_argument(
+        "--endpoint-url",
+        help="S3-compatible endpoint to use instead of AWS, e.g. MinIO",
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="re-ingest days that already have output",
+    )
+    parser.add_argument(
+        "--reprocess-quarantine",
+        nargs="*",
+        metavar="REASON",
+        help="only parse the quarantined rows excluded for these reasons "
+        "(default: all reasons) again, see quarantine.py",
+    )
+    args = parser.parse_args()
+    if args.reprocess_quarantine is not None:
+        reprocess_quarantine(
+            args.airports or [DEFAULT_AIRPORT],
+            args.reprocess_quarantine,
+            args.first_day,
+            args.last_day,
+        )
+        return
+    create_all_flights_tsv(
+        args.source,
+        args.workers,
+        args.rebuild,
+        args.endpoint_url,
+        args.airports or [DEFAULT_AIRPORT],
+        args.first_day,
+        args.last_day,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Arrivals rows that get-all-flights.py excluded or flagged, in SQLite.
+
+Each ingested day replaces its own rows in QUARANTINE_DB, so the table
+always matches the day files on disk; a day that fails to ingest keeps
+its day file and rows, and adds a row for the failure. Rows keep the
+arrivals CSV row they came from, so they can be queried by date, flight
+and reason and parsed again after the rules change without re-ingesting
+whole days:
+
+    python get-all-flights.py --reprocess-quarantine "Missing Time Zone"
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date
+
+import pandas as pd
+
+from arrivals import DEFAULT_AIRPORT
+
+QUARANTINE_DB = "data/quarantine.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quarantine (
+    airport TEXT NOT NULL,
+    date TEXT NOT NULL,  -- day of the arrivals file, YYYY-MM-DD
+    flight TEXT,
+    reason TEXT NOT NULL,
+    excluded INTEGER NOT NULL,  -- 0 for rows kept but flagged
+    row TEXT  -- the arrivals CSV row as a JSON object
+);
+CREATE INDEX IF NOT EXISTS quarantine_date_flight_reason
+    ON quarantine (date, flight, reason);
+CREATE INDEX IF NOT EXISTS quarantine_reason_date
+    ON quarantine (reason, date);
+"""
+
+
+def connect(path=QUARANTINE_DB):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Ingest workers write their days concurrently; SQLite serializes the
+    # writes and the timeout has them wait their turn.
+    connection = sqlite3.connect(path, timeout=60)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record_day(airport, day, quarantined, path=QUARANTINE_DB):
+    """Replace the day's quarantined rows.
+
+    Args:
+        quarantined: DataFrame with "Flight", "Reason", "Excluded" (bool)
+            and "Row" (JSON) columns, as returned by parse_arrivals()
+    """
+    rows = [
+        (airport, day.isoformat(), flight, reason, int(excluded), row)
+        for flight, reason, excluded, row in zip(
+            quarantined["Flight"],
+            quarantined["Reason"],
+            quarantined["Excluded"],
+            quarantined["Row"],
+        )
+    ]
+    with closing(connect(path)) as connection, connection:
+        connection.execute(
+            "DELETE FROM quarantine WHERE airport = ? AND date = ?",
+            (airport, day.isoformat()),
+        )
+        connection.executemany(
+            "INSERT INTO quarantine VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+
+
+def record_failure(airport, day, error, path=QUARANTINE_DB):
+    # A day that failed to ingest as a whole, so it shows up in queries.
+    # The rows of its day file from an earlier ingest stay until the day
+    # ingests again; only an earlier failure is replaced.
+    with closing(connect(path)) as connection, connection:
+        connection.execute(
+            "DELETE FROM quarantine"
+            " WHERE airport = ? AND date = ? AND flight IS NULL"
+            " AND reason LIKE 'Failed to ingest: %'",
+            (airport, day.isoformat()),
+        )
+        connection.execute(
+            "INSERT INTO quarantine VALUES (?, ?, NULL, ?, 1, NULL)",
+            (airport, day.isoformat(), f"Failed to ingest: {error}"),
+        )
+
+
+def query(
+    airport=DEFAULT_AIRPORT,
+    reasons=None,
+    first_day=None,
+    last_day=None,
+    flight=None,
+    excluded=None,
+    path=QUARANTINE_DB,
+):
+    """Return the quarantined rows matching every filter given.
+
+    Returns:
+        DataFrame with the quarantine table's columns, "row" as JSON
+    """
+    conditions = ["airport = ?"]
+    params = [airport]
+    if reasons:
+        conditions.append(f"reason IN ({', '.join('?' * len(reasons))})")
+        params.extend(reasons)
+    if first_day is not None:
+        conditions.append("date >= ?")
+        params.append(first_day.isoformat())
+    if last_day is not None:
+        conditions.append("date <= ?")
+        params.append(last_day.isoformat())
+    if flight is not None:
+        conditions.append("flight = ?")
+        params.append(flight)
+    if excluded is not None:
+        conditions.append("excluded = ?")
+        params.append(int(excluded))
+    with closing(connect(path)) as connection:
+        return pd.read_sql_query(
+            "SELECT * FROM quarantine WHERE "
+            + " AND ".join(conditions)
+            + " ORDER BY date, rowid",
+            connection,
+            params=params,
+        )
+
+
+def quarantined_arrivals(airport=DEFAULT_AIRPORT, **kwargs):
+    """Return excluded rows as the arrivals CSV rows they came from.
+
+    Takes the same filters as query().
+    """
+    rows = query(airport, excluded=True, **kwargs)["row"].dropna()
+    return pd.DataFrame(
+        [json.loads(row) for row in rows], index=rows.index, dtype=str
+    )
+
+
+def start():
+    parser = argparse.ArgumentParser(
+        description="Count or list quarantined arrivals rows."
+    )
+    parser.add_argument("--airport", default=DEFAULT_AIRPORT)
+    parser.add_argument("--reason", dest="reasons", action="append")
+    parser.add_argument("--first-day", type=date.fromisoformat)
+    parser.add_argument("--last-day", type=date.fromisoformat)
+    parser.add_argument("--flight")
+    parser.add_argument("--output", help="write the matching rows to this TSV")
+    args = parser.parse_args()
+
+    rows = query(
+        args.airport, args.reasons, args.first_day, args.last_day, args.flight
+    )
+    if args.output:
+        rows.to_csv(args.output, sep="\t", index=False)
+    for reason, count in rows["reason"].value_counts().items():
+        print(f"{reason}: {count}")
+
+
+if __name__ == "__main__":
+    start()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Render the flight figures in one go.
+
+The flights cube and the flights cache are brought up to date once, here,
+and then every figure script in FIGURES runs in a process pool with the
+Agg backend, so the scripts only read aggregates that are already built.
+A figure is skipped when its outputs exist and neither its script, the
+modules it reads through nor its data changed since it was last rendered.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from arrivals import DEFAULT_AIRPORT
+from flight_cube import cube_path, update_cube
+from flights import ALL_FLIGHTS_TSV, FLIGHTS_CACHE_DIR, load_flights
+from triturators import RULE_SETS
+from util import DEFAULT_WORKERS, atomic_write, fingerprint
+
+RENDERED = os.path.join(FLIGHTS_CACHE_DIR, "rendered_figures.json")
+
+CUBE_INPUTS = [
+    "flight_cube.py",
+    "flights.py",
+    "triturators.py",
+    cube_path(DEFAULT_AIRPORT),
+    *[
+        rules.airlines_tsv
+        for rules in RULE_SETS.values()
+        if rules.airlines_tsv is not None
+    ],
+]
+FLIGHTS_INPUTS = ["flights.py", ALL_FLIGHTS_TSV]
+
+# script -> (inputs besides the script itself, figures it writes). The
+# 2024-01-22 triturator scripts are left out: the 2024-01-31 ones replace
+# them and write the same files.
+FIGURES = {
+    "2023-12-06-plot-flight-hours.py": (
+        FLIGHTS_INPUTS,
+        ["top-30-flight hours.png", "top-30-flights.png"],
+    ),
+    "2023-12-11-plot-flight-hours-v2.py": (
+        CUBE_INPUTS,
+        ["flight_hours_per_nation.png"],
+    ),
+    "2023-12-11-plot-terminals_flight_hours.py": (
+        CUBE_INPUTS,
+        ["terminal_flight_hours_breakdown.png"],
+    ),
+    "2023-12-11-plot-terminals_flights.py": (
+        CUBE_INPUTS,
+        ["terminal_breakdown.png"],
+    ),
+    "2024-01-31-plot-airlines-triturators.py": (
+        CUBE_INPUTS,
+        ["triturator_airline_flight_hours.png"],
+    ),
+    "2024-01-31-plot-destinations-triturators.py": (
+        CUBE_INPUTS,
+        ["triturator_destination_flight_hours.png"],
+    ),
+    "2024-01-31-triturator-hours.py": (
+        CUBE_INPUTS,
+        ["triturator_flight_hours.png"],
+    ),
+}
+
+
+def input_fingerprints(script):
+    inputs, _ = FIGURES[script]
+    return {path: fingerprint(path) for path in [script, *inputs]}
+
+
+def load_rendered(path=RENDERED):
+    # {script: input fingerprints when its figures were last rendered}
+    if not os.path.exists(path):
+        return {}
+    with open(path) as inf:
+        return json.load(inf)
+
+
+def save_rendered(rendered, path=RENDERED):
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as outf:
+        json.dump(rendered, outf, indent=2)
+
+
+def is_current(script, rendered):
+    _, outputs = FIGURES[script]
+    return rendered.get(script) == input_fingerprints(script) and all(
+        os.path.exists(output) for output in outputs
+    )
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def render(script):
+    # Runs in a worker process
+    import matplotlib.pyplot as plt
+
+    module_name = os.path.splitext(script)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.start()
+    plt.close("all")
+    return script
+
+
+def render_figures(scripts=None, workers=DEFAULT_WORKERS, force=False):
+    """Render the scripts' figures that are stale.
+
+    Returns:
+        list of the scripts that failed; the others are still rendered
+    """
+    scripts = scripts or list(FIGURES)
+    # Built here so the workers don't race to build them
+    update_cube()
+    if any(FIGURES[script][0] == FLIGHTS_INPUTS for script in scripts):
+        load_flights()
+
+    rendered = load_rendered()
+    stale = [
+        script
+        for script in scripts
+        if force or not is_current(script, rendered)
+    ]
+    for script in scripts:
+        if script not in stale:
+            print(f"Unchanged: {script}")
+    if not stale:
+        return []
+
+    # Fingerprinted before rendering, so inputs that change while the
+    # figures render make them stale next time
+    fingerprints = {script: input_fingerprints(script) for script in stale}
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(stale)), initializer=_init_worker
+    ) as executor:
+        futures = {executor.submit(render, script): script for script in stale}
+        failed = []
+        for future in as_completed(futures):
+            script = futures[future]
+            try:
+                future.result()
+            except Exception:
+                # Not recorded as rendered, so it is tried again next time
+                print(f"Failed: {script}")
+                traceback.print_exc()
+                failed.append(script)
+                continue
+            rendered[script] = fingerprints[script]
+            save_rendered(rendered)
+            print(f"Rendered: {script}")
+    return failed
+
+
+def start():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "scripts",
+        nargs="*",
+        help="figure scripts to render (default: all of them)",
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="render figures even if their inputs are unchanged",
+    )
+    args = parser.parse_args()
+    for script in args.scripts:
+        if script not in FIGURES:
+            parser.error(f"{script} isn't one of {', '.join(FIGURES)}")
+
+    failed = render_figures(args.scripts, args.workers, args.force)
+    if failed:
+        sys.exit(f"{len(failed)} of the figure scripts failed")
+
+
+if __name__ == "__main__":
+    start()
@@ -0,0 +1,13 @@
+import numpy as np
+
+from detection_simulator import Inputs, simulate_many
+
+
+def test_numpy_seed_is_cached_like_the_int_it_equals(tmp_path):
+    inputs = Inputs.create_default()
+    for seed in np.arange(2):
+        results = simulate_many(inputs, 5, seed=seed, cache_dir=tmp_path)
+        assert results == simulate_many(
+            inputs, 5, seed=int(seed), cache_dir=tmp_path
+        )
+    assert len(list(tmp_path.iterdir())) == 2
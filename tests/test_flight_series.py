@@ -0,0 +1,53 @@
+from datetime import date
+
+import pandas as pd
+
+import flight_series
+from flight_series import build_daily_series, rolling_column
+
+
+def make_cube(flights_per_day):
+    return pd.DataFrame(
+        {
+            "Terminal": "E",
+            "Date": pd.to_datetime(list(flights_per_day)),
+            "Flights": list(flights_per_day.values()),
+            "Flight Hours": 2.0,
+            "Seat Hours": 300.0,
+        }
+    )
+
+
+def test_day_without_day_file_is_a_gap():
+    # Jan 3 has a day file but no flights; Jan 4 has no day file
+    cube = make_cube({"2024-01-01": 4, "2024-01-02": 4, "2024-01-05": 4})
+    days = ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-05"]
+    daily = build_daily_series(
+        cube, "Terminal", date(2024, 1, 1), date(2024, 1, 5), 2, days
+    ).set_index("Date")
+
+    assert daily.loc["2024-01-03", "Flights"] == 0
+    assert pd.isna(daily.loc["2024-01-04", "Flights"])
+    mean = daily[rolling_column("Flights", 2)]
+    assert mean["2024-01-02"] == 4
+    assert mean["2024-01-03"] == 2
+    # Windows that span the missing day are missing rather than low
+    assert pd.isna(mean["2024-01-04"])
+    assert pd.isna(mean["2024-01-05"])
+
+
+def test_week_with_missing_day_is_missing(monkeypatch):
+    # Mon Jan 1 to Sun Jan 14, without a day file for Jan 10
+    dates = pd.date_range("2024-01-01", "2024-01-14", unit="ms")
+    cube = make_cube({day: 1 for day in dates.strftime("%Y-%m-%d")})
+    days = list(cube["Date"].dt.strftime("%Y-%m-%d"))
+    days.remove("2024-01-10")
+    daily = build_daily_series(
+        cube, "Terminal", dates[0].date(), dates[-1].date(), 7, days
+    )
+    monkeypatch.setattr(flight_series, "daily_series", lambda by: daily)
+
+    weekly = flight_series.weekly_series().set_index("Week Ending")
+
+    assert weekly.loc["2024-01-07", "Flights"] == 7
+    assert pd.isna(weekly.loc["2024-01-14", "Flights"])
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Which triturator handles a flight's waste, as versioned rule sets.
+
+Each rule set is named after the day it came into force. Rules apply in
+this order, and the first that matches a flight decides it:
+
+1. nation_airlines: (origin nation, prime airline) pairs
+2. nations: origin nations, whatever the airline
+3. date_overrides: an airline handled elsewhere for a range of days
+4. airlines: prime airline
+5. foreign: any flight from outside the United States
+6. default
+
+Past analyses can be re-run with classify(flights, version=<their date>).
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+AA_TRITURATOR = "American Airlines\nTriturator"
+SWISSPORT_TRITURATOR = "Swissport\nTriturator"
+UNKNOWN = "Unknown"
+
+# Names used in the airline tables -> plot labels
+TRITURATOR_LABELS = {
+    "American Airlines": AA_TRITURATOR,
+    "Swissport": SWISSPORT_TRITURATOR,
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class TrituratorRules:
+    airlines: dict = field(default_factory=dict)
+    # Read into airlines when set, see read_airlines_tsv()
+    airlines_tsv: str = None
+    nations: dict = field(default_factory=dict)
+    nation_airlines: dict = field(default_factory=dict)
+    # (airline, first day, last day, triturator), days inclusive
+    date_overrides: tuple = ()
+    foreign: str = SWISSPORT_TRITURATOR
+    default: str = UNKNOWN
+
+
+SWISSPORT_GROUND_HANDLING = [
+    "Porter Airlines",
+    "LATAM Airlines",
+    "Hawaiian Airlines",
+    "BermudAir",
+    "Korean Air",
+    "Iberia",
+    "Fly Play",
+    "SAS Scandinavian Airlines",
+    "Qatar Airways",  # Closest match to 'Qatar'
+    "Qatar Executive",  # Also a match for 'Qatar'
+    "TAP Air Portugal",
+    "Turkish Airlines",
+    "Hainan Airlines",
+    "El Al Israel Airlines",
+    "Aer Lingus",
+    "ITA Airways",
+    "Condor",
+]
+
+RULE_SETS = {
+    "2024-01-22": TrituratorRules(
+        airlines={
+            "United Airlines": AA_TRITURATOR,
+            "American Airlines": AA_TRITURATOR,
+            "JetBlue Airways": SWISSPORT_TRITURATOR,
+            "Delta Air Lines": SWISSPORT_TRITURATOR,
+            "Southwest Airlines": SWISSPORT_TRITURATOR,
+        },
+        nations={"Canada": UNKNOWN},
+    ),
+    "2024-01-31": TrituratorRules(
+        airlines={
+            "United Airlines": AA_TRITURATOR,
+            "American Airlines": AA_TRITURATOR,
+            "JetBlue Airways": SWISSPORT_TRITURATOR,
+            "Delta Air Lines": SWISSPORT_TRITURATOR,
+            "Southwest Airlines": SWISSPORT_TRITURATOR,
+            **{
+                airline: SWISSPORT_TRITURATOR
+                for airline in SWISSPORT_GROUND_HANDLING
+            },
+        },
+        nations={"Canada": UNKNOWN},
+    ),
+    "2024-03-27": TrituratorRules(
+        airlines_tsv="2024-03-27_airlines_triturators.tsv",
+        nations={"Canada": UNKNOWN},
+    ),
+}
+
+# Not in force on any date: splits out JetBlue's Canadian flights to see
+# how much they contribute.
+JETBLUE_CANADA_RULES = TrituratorRules(
+    airlines=RULE_SETS["2024-01-31"].airlines,
+    nation_airlines={("Canada", "JetBlue Airways"): "JetBlue+Canada"},
+)
+
+
+def read_airlines_tsv(path):
+    airlines = pd.read_csv(path, sep="\t", dtype=str, keep_default_na=False)
+    return {
+        airline: TRITURATOR_LABELS.get(triturator, triturator)
+        for airline, triturator in zip(
+            airlines["Airline"], airlines["Triturator"]
+        )
+    }
+
+
+def get_rules(version=None):
+    """Return the rule set named version.
+
+    version may also be a date, for the rule set in force on that day, or
+    None for the latest rule set.
+    """
+    if isinstance(version, TrituratorRules):
+        return version
+    if version is None:
+        version = max(RULE_SETS)
+    elif isinstance(version, date):
+        in_force = [name for name in RULE_SETS if name <= version.isoformat()]
+        if not in_force:
+            raise ValueError(f"No triturator rules in force on {version}")
+        version = max(in_force)
+    rules = RULE_SETS[version]
+    if rules.airlines_tsv is not None:
+        rules = TrituratorRules(
+            airlines=read_airlines_tsv(rules.airlines_tsv),
+            nations=rules.nations,
+            nation_airlines=rules.nation_airlines,
+            date_overrides=rules.date_overrides,
+            foreign=rules.foreign,
+            default=rules.default,
+        )
+    return rules
+
+
+def classify(flights, version=None):
+    """Return the triturator status of each flight.
+
+    Args:
+        flights: DataFrame with "Nation" and "Prime Airline" columns, and a
+            "Date" column if the rule set has date overrides
+        version: rule set name, date or TrituratorRules; see get_rules()
+
+    Returns:
+        Series of triturator labels aligned with flights
+    """
+    rules = get_rules(version)
+    nation = flights["Nation"]
+    prime_airline = flights["Prime Airline"]
+
+    status = prime_airline.map(rules.airlines)
+    for airline, first_day, last_day, triturator in rules.date_overrides:
+        status[
+            (prime_airline == airline)
+            & (flights["Date"] >= pd.Timestamp(first_day))
+            & (flights["Date"] <= pd.Timestamp(last_day))
+        ] = triturator
+    status = status.where(
+        status.notna(),
+        np.where(nation != "United States", rules.foreign, rules.default),
+    )
+    status = nation.map(rules.nations).combine_first(status)
+    if rules.nation_airlines:
+        pairs = pd.MultiIndex.from_arrays([nation, prime_airline])
+        status = pd.Series(
+            pairs.map(rules.nation_airlines), index=flights.index
+        ).combine_first(status)
+    return status
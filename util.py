@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Helpers shared by the flight and simulation modules.
+
+Compiled indexes and caches record the fingerprint() of each file they
+were built from and are rebuilt when one changes. They, and the day files,
+are written through atomic_write(), so a reader never sees half a file.
+"""
+
+import os
+from contextlib import contextmanager
+
+# Process pool size for the ingest, tally, render and sweep pools
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def fingerprint(path):
+    # [mtime_ns, size], or None for a file that doesn't exist
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+@contextmanager
+def atomic_write(path, tmp_path=None):
+    """Yield a temporary path to write the new contents of path to.
+
+    The temporary file replaces path when the block finishes, and path's
+    directory is created first if need be.
+
+    Args:
+        tmp_path: where to write; defaults to path with ".tmp" appended
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = tmp_path or f"{path}.tmp"
+    yield tmp_path
+    os.replace(tmp_path, path)